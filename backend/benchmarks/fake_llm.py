@@ -0,0 +1,165 @@
+# backend/benchmarks/fake_llm.py
+"""
+Deterministic stand-in for the Gemini/OpenAI chat models.
+
+Recognises the prompts in services/mindmap_generator.py and answers them
+the way a real model would (graph JSON, a short title, a summary), built
+from the words of the input so merge/dedup see realistic graphs. Latency
+is latency +- jitter per call, seeded by the prompt so runs are repeatable.
+
+    from benchmarks.fake_llm import install_fake_llm
+    install_fake_llm(latency=0.2, jitter=0.05)
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from services.llm import llm_registry
+
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z-]{3,}")
+# Where each prompt of services/mindmap_generator.py puts its input
+_INPUT_PATTERNS = {
+    "graph": re.compile(r"Text:\s*(.*?)\s*Rules:", re.S),
+    "title": re.compile(r"Text:\s*(.*?)\s*Rules:", re.S),
+    "summary": re.compile(r"Current Chunk:\s*(.*?)\s*Summary:\s*$", re.S),
+    "merge": re.compile(r"Section Summaries:\s*(.*?)\s*Summary:\s*$", re.S),
+}
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with canned, input-derived answers and configurable latency."""
+
+    model: str = "fake"
+    latency: float = 0.05
+    jitter: float = 0.0
+    seed: int = 0
+    stream_pieces: int = 12
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    # -----------------------------
+    # Canned answers
+    # -----------------------------
+    @staticmethod
+    def _kind_and_text(prompt: str) -> tuple[str, str]:
+        if "mindmap generator" in prompt:
+            kind = "graph"
+        elif "short, descriptive title" in prompt:
+            kind = "title"
+        elif "Section Summaries:" in prompt:
+            kind = "merge"
+        else:
+            kind = "summary"
+        match = _INPUT_PATTERNS[kind].search(prompt)
+        return kind, match.group(1) if match else prompt
+
+    @staticmethod
+    def _keywords(text: str, count: int) -> list[str]:
+        seen, words = set(), []
+        for word in _WORD_RE.findall(text):
+            key = word.lower()
+            if key not in seen:
+                seen.add(key)
+                words.append(word.capitalize())
+            if len(words) == count:
+                break
+        while len(words) < count:
+            words.append(f"Topic {len(words) + 1}")
+        return words
+
+    def _graph(self, text: str) -> str:
+        words = self._keywords(text, 13)
+        nodes = [{"id": "node1", "type": "root", "data": {"label": words[0], "content": f"Overview of {words[0]}"}}]
+        edges = []
+        for i in range(4):
+            sub_id = f"node{len(nodes) + 1}"
+            nodes.append({"id": sub_id, "type": "sub", "data": {"label": words[1 + i], "content": f"{words[1 + i]} in context"}})
+            edges.append({"id": f"edge{len(edges) + 1}", "source": "node1", "target": sub_id})
+            for j in range(2):
+                label = words[5 + (2 * i + j) % 8]
+                detail_id = f"node{len(nodes) + 1}"
+                nodes.append({"id": detail_id, "type": "detail", "data": {"label": label, "content": f"{label} detail"}})
+                edges.append({"id": f"edge{len(edges) + 1}", "source": sub_id, "target": detail_id})
+        return json.dumps({"nodes": nodes, "edges": edges}, indent=2)
+
+    def _answer(self, prompt: str) -> str:
+        kind, text = self._kind_and_text(prompt)
+        if kind == "graph":
+            return self._graph(text)
+        if kind == "title":
+            return " ".join(self._keywords(text, 4))
+        # Summaries keep roughly a fifth of the input, like a real summarizer
+        words = text.split()
+        return " ".join(words[: max(20, len(words) // 5)])
+
+    def _delay(self, prompt: str) -> float:
+        digest = hashlib.blake2b(f"{self.seed}:{prompt}".encode(), digest_size=8).digest()
+        rng = random.Random(int.from_bytes(digest, "big"))
+        return max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+
+    def _respond(self, messages: list[BaseMessage]) -> tuple[str, float, dict]:
+        self.calls += 1
+        prompt = "\n".join(str(m.content) for m in messages)
+        answer = self._answer(prompt)
+        usage = {
+            "input_tokens": len(prompt) // 4,
+            "output_tokens": len(answer) // 4,
+            "total_tokens": (len(prompt) + len(answer)) // 4,
+        }
+        return answer, self._delay(prompt), usage
+
+    # -----------------------------
+    # BaseChatModel hooks
+    # -----------------------------
+    def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        answer, delay, usage = self._respond(messages)
+        time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=answer, usage_metadata=usage))])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        answer, delay, usage = self._respond(messages)
+        await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=answer, usage_metadata=usage))])
+
+    def _pieces(self, answer: str) -> list[str]:
+        size = max(1, len(answer) // self.stream_pieces)
+        return [answer[i:i + size] for i in range(0, len(answer), size)]
+
+    def _stream(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        answer, delay, _ = self._respond(messages)
+        pieces = self._pieces(answer)
+        for piece in pieces:
+            time.sleep(delay / len(pieces))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    async def _astream(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        answer, delay, _ = self._respond(messages)
+        pieces = self._pieces(answer)
+        for piece in pieces:
+            await asyncio.sleep(delay / len(pieces))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+
+def install_fake_llm(latency: float = 0.05, jitter: float = 0.0, seed: int = 0) -> dict[str, FakeChatModel]:
+    """Route the summarizer and graph roles of services.llm to fake models."""
+    models = {}
+    for role in ("summarizer", "graph"):
+        models[role] = FakeChatModel(model=f"fake-{role}", latency=latency, jitter=jitter, seed=seed)
+        llm_registry.override(role, models[role])
+    return models
+
+
+def uninstall_fake_llm():
+    for role in ("summarizer", "graph"):
+        llm_registry.override(role, None)
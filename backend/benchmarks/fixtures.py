@@ -0,0 +1,108 @@
+# backend/benchmarks/fixtures.py
+"""
+Generated benchmark corpora, written once to benchmarks/.fixtures/ (git-ignored).
+
+- small_html: ~2k-word article page with nav/footer boilerplate
+- large_html: ~60k-word page, the same boilerplate repeated between sections
+- pdf:        300-page report (PyMuPDF)
+- docx:       ~250-page document (python-docx)
+
+Text is built from a fixed-seed vocabulary, so every machine benchmarks the same input.
+"""
+import os
+import random
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), ".fixtures")
+FIXTURE_VERSION = 1
+
+_SYLLABLES = ["ka", "lo", "mi", "ren", "sa", "tor", "vi", "nel", "qua", "dis", "pre", "lum", "gra", "fen", "ox"]
+BOILERPLATE = (
+    "Home | Products | Pricing | Blog | Contact us. Subscribe to our newsletter for updates. "
+    "Copyright 2024 Example Corp. All rights reserved. Privacy policy. Terms of service. Cookie settings."
+)
+
+
+def _vocabulary(rng: random.Random, size: int = 3000) -> list[str]:
+    return ["".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+
+def _paragraph(rng: random.Random, words: list[str], sentences: int = 5) -> str:
+    out = []
+    for _ in range(sentences):
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(8, 20)))
+        out.append(sentence.capitalize() + ".")
+    return " ".join(out)
+
+
+def _sections(seed: int, sections: int, paragraphs: int) -> list[tuple[str, list[str]]]:
+    rng = random.Random(seed)
+    words = _vocabulary(rng)
+    return [
+        (" ".join(rng.choice(words) for _ in range(3)).title(), [_paragraph(rng, words) for _ in range(paragraphs)])
+        for _ in range(sections)
+    ]
+
+
+def _html(sections: list[tuple[str, list[str]]], boilerplate_every: int) -> str:
+    body = []
+    for i, (heading, paragraphs) in enumerate(sections):
+        body.append(f"<h2>{heading}</h2>")
+        body.extend(f"<p>{p}</p>" for p in paragraphs)
+        if boilerplate_every and i % boilerplate_every == boilerplate_every - 1:
+            body.append(f"<aside class='promo'><p>{BOILERPLATE}</p></aside>")
+    return (
+        "<html><head><title>Benchmark article</title></head><body>"
+        f"<nav>{BOILERPLATE}</nav><article><h1>Benchmark article</h1>{''.join(body)}</article>"
+        f"<footer>{BOILERPLATE}</footer></body></html>"
+    )
+
+
+def _write_pdf(path: str, sections: list[tuple[str, list[str]]], pages: int):
+    import fitz
+
+    doc = fitz.open()
+    per_page = max(1, len(sections) // pages)
+    for page_index in range(pages):
+        page = doc.new_page()
+        text = []
+        for heading, paragraphs in sections[page_index * per_page:(page_index + 1) * per_page]:
+            text.append(heading)
+            text.extend(paragraphs)
+        text.append(f"Page {page_index + 1} - Example Corp confidential")
+        page.insert_textbox(fitz.Rect(50, 50, 545, 792), "\n\n".join(text), fontsize=8)
+    doc.save(path)
+    doc.close()
+
+
+def _write_docx(path: str, sections: list[tuple[str, list[str]]]):
+    from docx import Document
+
+    doc = Document()
+    for heading, paragraphs in sections:
+        doc.add_heading(heading, level=2)
+        for paragraph in paragraphs:
+            doc.add_paragraph(paragraph)
+    doc.save(path)
+
+
+BUILDERS = {
+    "small_html": ("small.html", lambda path: _write_text(path, _html(_sections(1, 8, 4), 0))),
+    "large_html": ("large.html", lambda path: _write_text(path, _html(_sections(2, 160, 6), 10))),
+    "pdf": ("report.pdf", lambda path: _write_pdf(path, _sections(3, 300, 3), pages=300)),
+    "docx": ("document.docx", lambda path: _write_docx(path, _sections(4, 250, 4))),
+}
+
+
+def _write_text(path: str, text: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def fixture_path(name: str) -> str:
+    """Path of a fixture, generating it on first use."""
+    filename, build = BUILDERS[name]
+    path = os.path.join(FIXTURE_DIR, f"v{FIXTURE_VERSION}", filename)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        build(path)
+    return path
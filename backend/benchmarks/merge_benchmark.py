@@ -0,0 +1,138 @@
+# backend/benchmarks/merge_benchmark.py
+"""
+Micro-benchmark for utils.graph_merge.merge_mindmaps.
+
+Compares the indexed merge against the previous scan-based implementation
+on synthetic chunk graphs and checks both produce the same result.
+
+Usage (from backend/):
+    python -m benchmarks.merge_benchmark
+    python -m benchmarks.merge_benchmark --sizes 1000 10000 50000 --legacy-limit 10000
+"""
+import argparse
+import random
+import time
+
+from utils.graph_merge import merge_mindmaps
+
+
+def legacy_merge_mindmaps(mindmaps: list[dict]) -> dict:
+    """Previous O(nodes x edges) implementation, kept for comparison."""
+    merged_nodes = []
+    merged_edges = []
+    root_map = {}
+    child_map = {}
+    id_remap = {}
+
+    for mm in mindmaps:
+        for node in mm.get("nodes", []):
+            old_id = node["id"]
+            node_label = node["data"]["label"].strip().lower()
+
+            if node["type"] == "root":
+                if node_label in root_map:
+                    id_remap[old_id] = root_map[node_label]
+                    continue
+                else:
+                    root_map[node_label] = old_id
+                    merged_nodes.append(node)
+                    continue
+
+            parent_id = None
+            for e in mm.get("edges", []):
+                if e["target"] == old_id:
+                    parent_id = e["source"]
+                    break
+
+            key = (parent_id, node_label)
+            if parent_id and key in child_map:
+                id_remap[old_id] = child_map[key]
+                continue
+            else:
+                child_map[key] = old_id
+                merged_nodes.append(node)
+
+        for edge in mm.get("edges", []):
+            edge = edge.copy()
+            if edge["source"] in id_remap:
+                edge["source"] = id_remap[edge["source"]]
+            if edge["target"] in id_remap:
+                edge["target"] = id_remap[edge["target"]]
+
+            if not any(
+                e["source"] == edge["source"] and e["target"] == edge["target"]
+                for e in merged_edges
+            ):
+                merged_edges.append(edge)
+
+    return {"nodes": merged_nodes, "edges": merged_edges}
+
+
+def make_chunk_mindmap(chunk_index: int, size: int, rng: random.Random) -> dict:
+    """Build a root -> sub -> detail tree with some repeated labels across chunks."""
+    nodes = [{
+        "id": f"chunk{chunk_index}_0",
+        "type": "root",
+        "data": {"label": f"Topic {chunk_index % 3}", "content": "root"},
+    }]
+    edges = []
+    subs = max(1, size // 10)
+    for i in range(1, size):
+        node_id = f"chunk{chunk_index}_{i}"
+        if i <= subs:
+            parent, node_type = nodes[0]["id"], "sub"
+        else:
+            parent, node_type = f"chunk{chunk_index}_{rng.randint(1, subs)}", "detail"
+        nodes.append({
+            "id": node_id,
+            "type": node_type,
+            "data": {"label": f"Label {rng.randint(0, size // 2)}", "content": "detail"},
+        })
+        edges.append({"id": f"edge{chunk_index}_{i}", "source": parent, "target": node_id})
+    return {"nodes": nodes, "edges": edges}
+
+
+def make_mindmaps(total_nodes: int, chunks: int, seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    per_chunk = max(2, total_nodes // chunks)
+    return [make_chunk_mindmap(i, per_chunk, rng) for i in range(chunks)]
+
+
+def timed(func, mindmaps, repeat: int) -> tuple[float, dict]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(mindmaps)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 20000])
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy-limit", type=int, default=10000,
+                        help="skip the legacy implementation above this many nodes")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'edges':>8} {'indexed (ms)':>14} {'legacy (ms)':>14} {'speedup':>9}")
+    for size in args.sizes:
+        mindmaps = make_mindmaps(size, args.chunks)
+        edges = sum(len(mm["edges"]) for mm in mindmaps)
+        new_time, new_result = timed(merge_mindmaps, mindmaps, args.repeat)
+
+        if size <= args.legacy_limit:
+            old_time, old_result = timed(legacy_merge_mindmaps, mindmaps, 1)
+            assert old_result == new_result, "indexed merge diverged from legacy merge"
+            legacy_col = f"{old_time * 1000:14.1f}"
+            speedup = f"{old_time / new_time:8.1f}x"
+        else:
+            legacy_col, speedup = f"{'skipped':>14}", f"{'-':>9}"
+
+        print(f"{size:>8} {edges:>8} {new_time * 1000:14.1f} {legacy_col} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+# backend/benchmarks/pipeline_benchmark.py
+"""
+Offline end-to-end benchmark of the mindmap pipeline (extraction -> title ->
+chunking/dedup -> chunk LLM stages -> merge -> SSE formatting) with the
+deterministic fake LLM from benchmarks/fake_llm.py. No network or API keys.
+
+For every fixture it reports:
+- per-stage wall time of a single run (median of --repeat runs)
+- throughput and p50/p95 latency at each --concurrency level
+- the process's peak RSS after the fixture (high-water mark, so fixtures run small -> large)
+
+Chunk memo lookups are bypassed unless --warm, so every run does all its LLM calls.
+
+Usage (from backend/):
+    python -m benchmarks.pipeline_benchmark
+    python -m benchmarks.pipeline_benchmark --fixtures small_html pdf --concurrency 1 8 --latency 0.2 --jitter 0.1
+    python -m benchmarks.pipeline_benchmark --save-baseline benchmarks/.fixtures/baseline.json
+    python -m benchmarks.pipeline_benchmark --baseline benchmarks/.fixtures/baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from unittest import mock
+
+from core.config import settings
+from benchmarks.fake_llm import install_fake_llm
+from benchmarks.fixtures import BUILDERS, fixture_path
+from services import extraction_pool, pipeline
+from utils.cache import cache
+from utils.memo import chunk_memo
+from utils.sse import format_pipeline_event
+
+STAGES = ["extract", "title", "split", "chunks", "sse"]
+# Progress steps of services/pipeline.py that start each stage
+STAGE_STEPS = {
+    "Extracting": "extract",
+    "Generating title": "title",
+    "Splitting text": "split",
+    "Generating mindmap data": "chunks",
+}
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+async def _events(path: str):
+    """The pipeline the routes would run for this fixture, minus fetching and caching."""
+    if path.endswith(".html"):
+        yield pipeline.step("Extracting main content from HTML...")
+        with open(path, encoding="utf-8") as f:
+            text = await extraction_pool.extract_main_html(f.read())
+        async for event in pipeline.generate_graph(text):
+            yield event
+    else:
+        async for event in pipeline.file_pipeline(path, cleanup=False):
+            yield event
+
+
+async def run_once(path: str) -> dict:
+    """One full run; returns {stage: seconds, "total": seconds, "nodes", "edges"}."""
+    timings = dict.fromkeys(STAGES, 0.0)
+    stage, stage_start = None, time.perf_counter()
+    start = stage_start
+    graph = None
+    event_id = 0
+
+    async for event, payload in _events(path):
+        now = time.perf_counter()
+        if event == "step":
+            next_stage = next((name for prefix, name in STAGE_STEPS.items() if payload.startswith(prefix)), None)
+            if next_stage and next_stage != stage:
+                if stage:
+                    timings[stage] += now - stage_start
+                stage, stage_start = next_stage, now
+        elif event == "result":
+            graph = payload["graph"]
+
+        event_id += 1
+        format_start = time.perf_counter()
+        format_pipeline_event(event, payload, event_id=event_id)
+        timings["sse"] += time.perf_counter() - format_start
+
+    end = time.perf_counter()
+    if stage:
+        timings[stage] += end - stage_start
+    timings["total"] = end - start
+    timings["nodes"] = len(graph["nodes"])
+    timings["edges"] = len(graph["edges"])
+    return timings
+
+
+async def bench_fixture(name: str, concurrency: list[int], repeat: int) -> dict:
+    path = fixture_path(name)
+
+    runs = []
+    for _ in range(repeat):
+        # Cold runs: file_pipeline would otherwise return the cached graph of the fixture
+        cache.clear()
+        chunk_memo.memory.clear()
+        runs.append(await run_once(path))
+    stages = {key: round(statistics.median(r[key] for r in runs), 4) for key in STAGES + ["total"]}
+
+    throughput = {}
+    for n in concurrency:
+        cache.clear()
+        chunk_memo.memory.clear()
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_once(path) for _ in range(n)))
+        wall = time.perf_counter() - start
+        totals = [r["total"] for r in results]
+        throughput[str(n)] = {
+            "docs_per_sec": round(n / wall, 3),
+            "p50_secs": round(percentile(totals, 50), 4),
+            "p95_secs": round(percentile(totals, 95), 4),
+        }
+
+    return {
+        "size_bytes": os.path.getsize(path),
+        "nodes": runs[-1]["nodes"],
+        "edges": runs[-1]["edges"],
+        "stages": stages,
+        "throughput": throughput,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of current vs baseline beyond tolerance (fraction), as messages."""
+    regressions = []
+
+    def check(label, now, before, higher_is_worse=True):
+        if before is None or now is None or before <= 0:
+            return
+        change = (now - before) / before
+        if (change if higher_is_worse else -change) > tolerance:
+            regressions.append(f"{label}: {before:g} -> {now:g} ({change:+.0%})")
+
+    for name, result in current["fixtures"].items():
+        base = baseline.get("fixtures", {}).get(name)
+        if not base:
+            continue
+        for stage, seconds in result["stages"].items():
+            check(f"{name} {stage} secs", seconds, base["stages"].get(stage))
+        for n, numbers in result["throughput"].items():
+            before = base["throughput"].get(n, {})
+            check(f"{name} x{n} docs/sec", numbers["docs_per_sec"], before.get("docs_per_sec"), higher_is_worse=False)
+            check(f"{name} x{n} p95 secs", numbers["p95_secs"], before.get("p95_secs"))
+        check(f"{name} peak RSS MB", result["peak_rss_mb"], base.get("peak_rss_mb"))
+    return regressions
+
+
+def print_report(report: dict):
+    header = "".join(f"{stage:>9}" for stage in STAGES + ["total"])
+    print(f"\n{'fixture':<12}{'nodes':>7}{header}{'rss MB':>9}")
+    for name, result in report["fixtures"].items():
+        cols = "".join(f"{result['stages'][stage]:9.3f}" for stage in STAGES + ["total"])
+        print(f"{name:<12}{result['nodes']:>7}{cols}{result['peak_rss_mb']:9.1f}")
+
+    print(f"\n{'fixture':<12}{'N':>5}{'docs/sec':>10}{'p50 s':>9}{'p95 s':>9}")
+    for name, result in report["fixtures"].items():
+        for n, numbers in result["throughput"].items():
+            print(f"{name:<12}{n:>5}{numbers['docs_per_sec']:10.2f}{numbers['p50_secs']:9.3f}{numbers['p95_secs']:9.3f}")
+
+
+async def run(args) -> dict:
+    # The fake model has no provider quota: skip the rpm/tpm buckets, keep the AIMD limiter
+    settings.LLM_RATE_LIMITS = {"FakeChatModel": {}}
+    if args.mode:
+        settings.CHUNK_PIPELINE_MODE = args.mode
+    install_fake_llm(latency=args.latency, jitter=args.jitter, seed=args.seed)
+
+    memo = contextlib.nullcontext() if args.warm else mock.patch.object(chunk_memo, "get", return_value=None)
+    report = {
+        "config": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "seed": args.seed,
+            "mode": settings.CHUNK_PIPELINE_MODE,
+            "chunker": settings.CHUNKER,
+            "warm": args.warm,
+        },
+        "fixtures": {},
+    }
+    with memo:
+        for name in args.fixtures:
+            print(f"Benchmarking {name}...", file=sys.stderr)
+            report["fixtures"][name] = await bench_fixture(name, args.concurrency, args.repeat)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", nargs="+", choices=list(BUILDERS), default=list(BUILDERS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="mean fake LLM latency (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="+- uniform jitter on the latency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=["sequential", "parallel", "tree"], help="override CHUNK_PIPELINE_MODE")
+    parser.add_argument("--warm", action="store_true", help="let runs hit the chunk memo")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--save-baseline", help="write the report as the new baseline")
+    parser.add_argument("--baseline", help="compare against this baseline and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown as a fraction")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    for path in filter(None, [args.json, args.save_baseline]):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("\nWarning: baseline was recorded with a different config", file=sys.stderr)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
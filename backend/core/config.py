@@ -14,8 +14,140 @@ class Settings(BaseSettings):
     GEMINI_MODEL_SUMMARIZER: str = "gemini-2.0-flash-lite"
     GEMINI_MODEL_GRAPH: str = "gemini-2.0-flash"
 
-    CHUNK_SIZE: int = 1200
-    CHUNK_OVERLAP: int = 120
+    # Chunker: "tokens" sizes chunks from the summarizer's context window (capped at
+    # CHUNK_MAX_TOKENS); "chars" uses the character splitter with CHUNK_SIZE / CHUNK_OVERLAP
+    CHUNKER: str = "tokens"
+    CHUNK_MAX_TOKENS: int = 6000
+    CHUNK_OVERLAP_TOKENS: int = 100
+    CHUNK_OUTPUT_RESERVE_TOKENS: int = 2048
+    CHUNK_SIZE: int = 3000
+    CHUNK_OVERLAP: int = 200
+
+    # Chunk pipeline: "parallel" (map-reduce), "sequential" (rolling summary)
+    # or "tree" (summaries merged TREE_FANOUT at a time up to a document summary).
+    # The default is "parallel": chunks no longer see the previous chunk's summary.
+    # Set "sequential" for the original rolling-summary behaviour.
+    CHUNK_PIPELINE_MODE: str = "parallel"
+    CHUNK_CONCURRENCY: int = 4
+    TREE_FANOUT: int = 4
+
+    # Drop near-duplicate chunks (MinHash estimated Jaccard >= threshold) before the LLM stages
+    CHUNK_DEDUP: bool = True
+    CHUNK_DEDUP_THRESHOLD: float = 0.85
+
+    # Collapse near-duplicate sub/detail nodes in the final graph (needs numpy)
+    NODE_DEDUP: bool = False
+    NODE_DEDUP_THRESHOLD: float = 0.8
+    # Node types with more nodes than this are left as-is (the pass is ~0.1ms per node)
+    NODE_DEDUP_MAX_NODES: int = 10000
+
+    # Cancel LLM work when every SSE client of a generation has disconnected,
+    # unless it is at least CANCEL_KEEP_PROGRESS done (then finish it so it gets cached)
+    CANCEL_ON_DISCONNECT: bool = True
+    CANCEL_GRACE_SECS: float = 5
+    CANCEL_KEEP_PROGRESS: float = 0.8
+    DISCONNECT_POLL_SECS: float = 1
+
+    # Stream graph tokens and push each node/edge to SSE clients as it closes
+    GRAPH_STREAMING: bool = True
+
+    # Result cache (utils/cache.py)
+    CACHE_TTL_SECS: int = 3600
+    CACHE_MAX_ENTRIES: int = 256
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_STORE_TEXT: bool = False
+
+    # Shared HTTP client (services/http_client.py); TIMEOUT_SECS is the default request timeout
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 10
+    HTTP_KEEPALIVE_EXPIRY_SECS: float = 30
+    HTTP_CONNECT_TIMEOUT_SECS: float = 5
+    HTTP2: bool = True
+
+    # Page downloads stop at this many bytes (the rest is discarded)
+    FETCH_MAX_BYTES: int = 5 * 1024 * 1024
+
+    # Revalidation cache: validators + extracted text (+ graph) per source URL
+    SOURCE_CACHE_TTL_SECS: int = 7 * 24 * 3600
+    SOURCE_CACHE_MAX_ENTRIES: int = 512
+    SOURCE_CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+
+    # Chunk-level memo of summarizer / graph LLM outputs (utils/memo.py)
+    MEMO_MAX_ENTRIES: int = 4096
+    MEMO_MAX_BYTES: int = 64 * 1024 * 1024
+    MEMO_TTL_SECS: int = 7 * 24 * 3600
+    MEMO_DB_PATH: str | None = None      # e.g. ".cache/chunk_memo.sqlite3" to persist across restarts
+    MEMO_DISK_MAX_ENTRIES: int = 50000
+
+    # Shared LLM scheduler (utils/llm_scheduler.py), one per provider/model.
+    # LLM_RATE_LIMITS overrides the budget by key prefix, e.g.
+    # {"ChatGoogleGenerativeAI:gemini-2.0-flash": {"rpm": 15, "tpm": 1000000}}
+    LLM_RPM: int | None = 60
+    LLM_TPM: int | None = 1_000_000
+    LLM_RATE_LIMITS: dict[str, dict[str, int]] = {}
+    LLM_INITIAL_CONCURRENCY: int = 4
+    LLM_MIN_CONCURRENCY: int = 1
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_LATENCY_TARGET_SECS: float = 30
+    LLM_AIMD_DECREASE: float = 0.5
+    LLM_AIMD_COOLDOWN_SECS: float = 5
+    LLM_BACKOFF_BASE_SECS: float = 2
+    LLM_BACKOFF_MAX_SECS: float = 60
+
+    # Provider routing (services/llm_router.py): providers with a key, in preference order.
+    # A call still running past its provider's LLM_HEDGE_PERCENTILE latency is
+    # duplicated to the next provider; the first answer wins.
+    LLM_PROVIDERS: list[str] = ["gemini", "openai"]
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILE: float = 95
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_DEFAULT_SECS: float = 45   # hedge delay until enough samples exist
+    LLM_ROUTER_WINDOW: int = 200
+    LLM_HTTP_TIMEOUT_SECS: float = 120   # shared OpenAI connection pool (services/llm.py)
+
+    # Background jobs (services/jobs.py)
+    JOB_DB_PATH: str = ".cache/jobs.sqlite3"
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_MAX: int = 100
+    JOB_TTL_SECS: int = 24 * 3600
+    JOB_PRUNE_SECS: float = 3600       # how often finished jobs older than JOB_TTL_SECS are deleted
+    # Job events are written to SQLite in batches (tailing clients read unwritten ones from memory)
+    JOB_EVENT_BATCH: int = 50
+    JOB_EVENT_FLUSH_SECS: float = 0.5
+    JOB_KEEPALIVE_SECS: float = 15
+
+    # Extraction worker pool: "thread" or "process"
+    EXTRACTION_POOL_KIND: str = "thread"
+    EXTRACTION_MAX_WORKERS: int = 4
+    EXTRACTION_TIMEOUT_SECS: float = 60
+
+    # Uploads are streamed to disk in UPLOAD_CHUNK_BYTES pieces; bigger than UPLOAD_MAX_BYTES -> 413
+    UPLOAD_MAX_BYTES: int = 2 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 64 * 1024
+    # Upload store (utils/uploads.py): one file per content, unused files expire
+    # after UPLOAD_TTL_SECS and the oldest go first past UPLOAD_MAX_TOTAL_BYTES
+    UPLOAD_DIR: str = ".cache/uploads"
+    UPLOAD_TTL_SECS: int = 3600
+    UPLOAD_MAX_TOTAL_BYTES: int = 512 * 1024 * 1024
+    UPLOAD_SWEEP_SECS: float = 60
+    # Key signing upload tokens ("<sha256>-<hmac>"); unset -> a random key kept in UPLOAD_DIR
+    UPLOAD_TOKEN_SECRET: str | None = None
+
+    # Admission control (utils/admission.py): at most ADMISSION_MAX_CONCURRENT
+    # generations run at once; up to ADMISSION_MAX_QUEUED wait, the rest get 503.
+    # Queue order is arrival time + estimated chunks * ADMISSION_SECS_PER_COST.
+    ADMISSION_MAX_CONCURRENT: int = 8
+    ADMISSION_MAX_QUEUED: int = 32
+    ADMISSION_SECS_PER_COST: float = 2
+    ADMISSION_URL_COST: float = 8              # estimated chunks of a webpage
+    ADMISSION_BYTES_PER_COST: int = 24_000     # upload bytes per estimated chunk
+    ADMISSION_RETRY_AFTER_SECS: int = 30       # until run times have been measured
+
+    # Metrics (utils/metrics.py): Prometheus text at /api/metrics, and a
+    # per-run {"stages", "llm", "total_secs"} summary in the final result event
+    METRICS_ENABLED: bool = True
+    PIPELINE_TIMINGS_IN_RESULT: bool = True
 
     CORS_ORIGINS: list[str] = ["http://localhost:3000","http://localhost:3001"]
 
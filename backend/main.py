@@ -1,13 +1,34 @@
 # backend/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from core.logging import setup_logging
 from routes.url_validation import router as url_validation_router
 from routes.mindmap import router as mindmap_router
+from routes.jobs import router as jobs_router
+from routes.metrics import router as metrics_router
+from services import extraction_pool, http_client
+from services.llm import llm_registry
+from services.jobs import job_manager
+from utils.uploads import upload_store
 
 setup_logging()
 
-app = FastAPI(title="Cognet Backend", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: one pooled HTTP client for the whole app
+    http_client.start_client()
+    await job_manager.start()
+    upload_store.start()
+    yield
+    # Shutdown: stop job workers and the upload sweeper, close pooled connections (fetch + LLM) and stop extraction workers
+    await job_manager.stop()
+    await upload_store.stop()
+    await http_client.close_client()
+    await llm_registry.aclose()
+    extraction_pool.pool.shutdown()
+
+app = FastAPI(title="Cognet Backend", version="0.1.0", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -25,3 +46,5 @@ def root():
 
 app.include_router(url_validation_router, prefix='/api')
 app.include_router(mindmap_router, prefix='/api')
+app.include_router(jobs_router, prefix='/api')
+app.include_router(metrics_router, prefix='/api')
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import StreamingResponse
+from schemas.mindmap import MindmapRequest
+from schemas.jobs import FileJobRequest, JobCreatedResponse, JobResponse
+from services import pipeline
+from services.jobs import job_manager
+from utils.sse import format_error, format_pipeline_event
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------
+# Submit jobs
+# -----------------------------
+@router.post("/jobs/url", response_model=JobCreatedResponse)
+async def create_url_job(request: MindmapRequest):
+    """Queue a mindmap generation for a URL and return its job id."""
+    url = request.url.strip()
+    # Jobs are bounded by JOB_QUEUE_MAX; once a worker picks one up it waits for admission like any run
+    job_id, created = job_manager.submit(
+        "url", url, pipeline.url_key(url), lambda: pipeline.admitted_url_pipeline(url, bounded=False)
+    )
+    return {"job_id": job_id, "created": created}
+
+
+@router.post("/jobs/file", response_model=JobCreatedResponse)
+async def create_file_job(request: FileJobRequest):
+    """Queue a mindmap generation for a file uploaded via /upload-temp-file."""
+    file_path = pipeline.upload_path(request.token)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="File not found or expired")
+
+    job_id, created = job_manager.submit(
+        "file", request.token, pipeline.file_key(pipeline.upload_hash(file_path)),
+        lambda: pipeline.admitted_file_pipeline(file_path, bounded=False),
+    )
+    return {"job_id": job_id, "created": created}
+
+
+# -----------------------------
+# Status + resumable event stream
+# -----------------------------
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {**job, "job_id": job["id"]}
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(
+    job_id: str,
+    last_event_id: int | None = None,
+    last_event_id_header: str | None = Header(default=None, alias="Last-Event-ID"),
+):
+    """
+    SSE stream of a job's events. Replays everything after Last-Event-ID
+    (header, or ?last_event_id= for clients that can't set headers), then follows live.
+    """
+    if job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if last_event_id is None:
+        try:
+            last_event_id = int(last_event_id_header) if last_event_id_header else -1
+        except ValueError:
+            last_event_id = -1
+
+    async def sse_stream():
+        async for item in job_manager.events(job_id, last_event_id):
+            if item is None:
+                # Keep proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            seq, event, payload = item
+            if event == "error":
+                yield format_error(payload["message"], seq)
+            else:
+                yield format_pipeline_event(event, payload, seq)
+
+    return StreamingResponse(sse_stream(), media_type="text/event-stream")
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from core.config import settings
+from services import extraction_pool
+from services.fetcher import source_cache
+from services.jobs import job_manager
+from services.llm_router import latency_tracker
+from utils.admission import admission
+from utils.cache import cache
+from utils.llm_scheduler import llm_scheduler
+from utils.memo import chunk_memo
+from utils.metrics import metrics
+from utils.singleflight import flights
+from utils.uploads import upload_store
+
+router = APIRouter()
+
+# Existing stats() counters, read at scrape time
+metrics.register_stats("cognet_cache", cache.stats)
+metrics.register_stats("cognet_source_cache", source_cache.stats)
+metrics.register_stats("cognet_chunk_memo", chunk_memo.stats)
+metrics.register_stats("cognet_flights", flights.stats)
+metrics.register_stats("cognet_admission", admission.stats)
+metrics.register_stats("cognet_jobs", job_manager.stats)
+metrics.register_stats("cognet_extraction_pool", extraction_pool.pool.stats)
+metrics.register_stats("cognet_uploads", upload_store.stats)
+metrics.register_stats("cognet_llm_scheduler", llm_scheduler.stats, label="provider")
+metrics.register_stats("cognet_llm_router", latency_tracker.stats, label="provider")
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of pipeline, LLM, cache and queue metrics."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
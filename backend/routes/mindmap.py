@@ -1,29 +1,19 @@
-from fastapi import File, UploadFile, APIRouter, HTTPException, BackgroundTasks
+from fastapi import File, UploadFile, APIRouter, HTTPException, BackgroundTasks, Request
 from fastapi.responses import StreamingResponse
 from services.llm import get_summarizer_llm
 from schemas.mindmap import MindmapRequest
-from services import fetcher, extractor, mindmap_generator
-from utils.cache import cache
-from io import BytesIO
-from langchain.prompts import PromptTemplate
-import tempfile, os, json, logging
+from services import extraction_pool, pipeline
+from services.mindmap_generator import SUMMARY_PROMPT
+from services.pipeline import mindmap_gen
+from utils.admission import admission, estimate_cost
+from utils.singleflight import flights
+from utils.sse import format_error, format_pipeline_event, until_disconnected
+from utils.uploads import spool_upload, upload_store
+import os, logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-mindmap_gen = mindmap_generator.MindmapGenerator()
-
-# ✅ PromptTemplate for summarization
-SUMMARY_PROMPT = PromptTemplate(
-    input_variables=["previous_summary", "current_chunk"],
-    template=(
-        "Summarize the following text, combining with the previous summary:\n\n"
-        "Previous Summary: {previous_summary}\n\n"
-        "Current Chunk: {current_chunk}\n\n"
-        "Summary:"
-    ),
-)
-
 # allowed types mapping
 ALLOWED_FILE_TYPES = {
     "application/pdf": "pdf",
@@ -35,7 +25,7 @@ ALLOWED_FILE_TYPES = {
 }
 
 async def extract_text_from_file(file: UploadFile):
-    """Extract text based on file type."""
+    """Extract text based on file type (the upload is spooled to disk, not held in memory)."""
     content_type = file.content_type
     if content_type not in ALLOWED_FILE_TYPES:
         raise HTTPException(
@@ -43,19 +33,25 @@ async def extract_text_from_file(file: UploadFile):
             detail=f"Unsupported file type: {content_type}. Allowed types: {', '.join(ALLOWED_FILE_TYPES.keys())}"
         )
 
-    file_bytes = BytesIO(await file.read())
-
-    if content_type == "application/pdf":
-        return extractor.extract_text_from_pdf(file_bytes)
-    elif content_type in ["application/msword", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]:
-        return extractor.extract_text_from_doc(file_bytes)
-    elif content_type in ["text/plain", "text/markdown"]:
-        return (await file.read()).decode("utf-8") if hasattr(file, "read") else file_bytes.getvalue().decode("utf-8")
-    elif content_type == "text/html":
-        html_content = file_bytes.getvalue().decode("utf-8")
-        return extractor.extract_main_html(html_content)
-    else:
-        return ""
+    # Size-capped (413) copy to disk; extractors open the file themselves
+    upload = await spool_upload(file, suffix="." + ALLOWED_FILE_TYPES[content_type])
+    try:
+        if content_type == "application/pdf":
+            return await extraction_pool.extract_text_from_pdf(upload.path)
+        elif content_type in ["application/msword", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]:
+            return await extraction_pool.extract_text_from_doc(upload.path)
+        elif content_type in ["text/plain", "text/markdown"]:
+            return await extraction_pool.extract_text_from_txt(upload.path)
+        elif content_type == "text/html":
+            html_content = await extraction_pool.extract_text_from_txt(upload.path)
+            return await extraction_pool.extract_main_html(html_content)
+        else:
+            return ""
+    finally:
+        try:
+            os.remove(upload.path)
+        except OSError as e:
+            logger.warning(f"Failed to delete spooled upload {upload.path}: {e}")
     
 
 @router.post("/generate-mindmap-by-url")
@@ -66,92 +62,46 @@ async def generate_mindmap_from_url(request: MindmapRequest):
     try:
         url = request.url.strip()
 
-        # 1️⃣ Cache lookup
-        cached = cache.get_cache(url)
-        if cached:
-            return {"source": url, "graph": cached["graph"],"title": cached.get("title", None), "cached": True}
-
-        # 2️⃣ Fetch HTML
-        html = await fetcher.fetch_url(url)
-
-        # 3️⃣ Extract main content
-        text = extractor.extract_main_html(html)
-
-        # 4️⃣ Generate title from text
-        title = await mindmap_gen.generate_title(text)
-
-        # 5️⃣ Split into chunks
-        chunks = await mindmap_gen.split_text_into_chunks(text, chunk_size=3000)
-
-        # 6️⃣ Summarizer
-        summarizer = get_summarizer_llm()
-
-        # 7️⃣ Process and generate mindmap
-        final_graph = await mindmap_gen.process_chunks_and_generate_mindmap(chunks, summarizer, SUMMARY_PROMPT)
-
-        # 8️⃣ Cache result
-        cache.set_cache(url, {"graph": final_graph, "text": text,"title": title})
+        # Cache lookup -> fetch (conditional) -> extract -> title -> chunks -> mindmap -> cache
+        # Identical in-flight requests share one run; a new run waits for admission (or 503s)
+        flight, _ = flights.join(
+            pipeline.url_key(url), lambda token: pipeline.admitted_url_pipeline(url, cancel_token=token)
+        )
+        result = await pipeline.run_to_result(flight.subscribe())
 
-        return {"source": url, "graph": final_graph,"title": title, "cached": False}
+        return {"source": url, "graph": result["graph"], "title": result["title"], "cached": result["cached"]}
 
+    except HTTPException:
+        # Already carries the right status (e.g. 415 unsupported content, 504 timeout)
+        raise
     except Exception as e:
         logger.error(f"Error generating mindmap from URL: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 # Streaming response of every step
 @router.get("/generate-mindmap-by-url-sse")
-async def generate_mindmap_sse(url:str):
+async def generate_mindmap_sse(url:str, request: Request):
     """
     SSE endpoint to generate mindmap and stream step updates.
     """
+    # Attach to an identical in-flight generation or lead a new one. Joining before
+    # the stream starts lets a full admission queue answer 503 + Retry-After.
+    flight, _ = flights.join(
+        pipeline.url_key(url), lambda token: pipeline.admitted_url_pipeline(url, cancel_token=token)
+    )
 
     async def sse_wrapper_generate_mindmap(url: str):
         """SSE generator yielding step updates."""
         try:
-            # Step 1: Cache lookup
-            yield f"data: Checking cache for URL...\n\n"
-            cached = cache.get_cache(url)
-            if cached:
-                yield f"data: Cache hit! Returning cached mindmap.\n\n"
-                yield f"data: {json.dumps({'graph': cached['graph'], 'title': cached.get('title')})}\n\n"
-                return
-
-            # Step 2: Fetch content
-            yield f"data: Fetching webpage content...\n\n"
-            html = await fetcher.fetch_url(url)
-
-            # Step 3: Extract main content
-            yield f"data: Extracting main content from HTML...\n\n"
-            text = extractor.extract_main_html(html)
-
-            # Step 4: Generate title
-            yield f"data: Generating title for the document...\n\n"
-            title = await mindmap_gen.generate_title(text)
-
-            # Step 5: Split text into chunks
-            yield f"data: Splitting text into chunks...\n\n"
-            chunks = await mindmap_gen.split_text_into_chunks(text, chunk_size=3000)
-
-            # Step 6: Summarizer
-            summarizer = get_summarizer_llm()
-
-            # Step 7: Process & generate mindmap (only one update for all chunks)
-            yield f"data: Generating mindmap data...\n\n"
-            final_graph = await mindmap_gen.process_chunks_and_generate_mindmap(
-                chunks, summarizer, SUMMARY_PROMPT
-            )
-
-            # Step 8: Cache result
-            yield f"data: Caching generated mindmap...\n\n"
-            cache.set_cache(url, {"graph": final_graph, "text": text, "title": title})
-
-            # Step 9: Done
-            yield f"data: Done\n\n"
-            yield f"data: {json.dumps({'graph': final_graph, 'title': title})}\n\n"
+            event_id = 0
+            # Leaving early lets the flight cancel its LLM work once nobody is listening
+            async for event, payload in until_disconnected(request, flight.subscribe()):
+                yield format_pipeline_event(event, payload, event_id)
+                event_id += 1
 
         except Exception as e:
             logger.error(f"Error in SSE wrapper: {e}", exc_info=True)
-            yield f"data: Error generating mindmap: {str(e)}\n\n"
+            yield format_error(f"Error generating mindmap: {str(e)}")
 
     return StreamingResponse(
         sse_wrapper_generate_mindmap(url),
@@ -163,7 +113,11 @@ async def generate_mindmap_sse(url:str):
 # -------------------------
 @router.post("/generate-mindmap-by-file")
 async def generate_mindmap_from_file(file: UploadFile = File(...)):
+    # Wait for a generation slot (503 + Retry-After when the queue is full)
+    ticket = admission.reserve(estimate_cost(size=file.size))
     try:
+        await ticket.acquire()
+
         # 1️⃣ Extract text based on type
         text = await extract_text_from_file(file)
 
@@ -171,7 +125,8 @@ async def generate_mindmap_from_file(file: UploadFile = File(...)):
         title = await mindmap_gen.generate_title(text)
 
         # 3️⃣ Split into chunks
-        chunks = await mindmap_gen.split_text_into_chunks(text, chunk_size=3000)
+        chunks = await mindmap_gen.split_text_into_chunks(text)
+        chunks, _ = await pipeline.drop_duplicate_chunks(chunks)
 
         # 4️⃣ Summarizer
         summarizer = get_summarizer_llm()
@@ -181,9 +136,13 @@ async def generate_mindmap_from_file(file: UploadFile = File(...)):
 
         return {"source": file.filename, "graph": final_graph, "title": title}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating mindmap from file: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        ticket.release()
     
 
 # -----------------------------
@@ -198,14 +157,12 @@ async def upload_file_temp(file: UploadFile):
         )
 
     try:
-        suffix = "." + ALLOWED_FILE_TYPES[file.content_type]
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        temp_file.write(await file.read())
-        temp_file.close()
-
-        token = os.path.basename(temp_file.name)
+        # Streamed into the upload store with the size cap enforced; identical files are stored once
+        token = await upload_store.save(file, suffix="." + ALLOWED_FILE_TYPES[file.content_type])
         return {"token": token}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading file: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to upload file")
@@ -215,64 +172,45 @@ async def upload_file_temp(file: UploadFile):
 # 2️⃣ SSE endpoint to generate mindmap from uploaded file
 # -----------------------------
 @router.get("/generate-mindmap-by-file-sse")
-async def generate_mindmap_file_sse(token: str, background_tasks: BackgroundTasks):
+async def generate_mindmap_file_sse(token: str, background_tasks: BackgroundTasks, request: Request):
     """
     SSE endpoint to process a file and stream step updates.
-    Token corresponds to the temporary file.
+    Token corresponds to a file in the upload store (kept until it expires there).
     """
 
-    file_path = os.path.join(tempfile.gettempdir(), token)
-    if not os.path.exists(file_path):
+    file_path = pipeline.upload_path(token)
+    if file_path is None:
         raise HTTPException(status_code=404, detail="File not found or expired")
 
+    # Detect file type by extension
+    ext = os.path.splitext(file_path)[1].lower()
+    flight, is_leader = None, False
+    if ext in [".pdf", ".txt", ".doc", ".docx"]:
+        # Identical files in flight (same content hash) share one run.
+        # Joined before the stream starts so a full admission queue can answer 503
+        flight, is_leader = flights.join(
+            pipeline.file_key(pipeline.upload_hash(file_path)),
+            lambda cancel_token: pipeline.admitted_file_pipeline(file_path, cancel_token=cancel_token),
+        )
+
     async def sse_stream():
         try:
             yield f"data: Validating file...\n\n"
 
-            # Detect file type by extension
-            ext = os.path.splitext(file_path)[1].lower()
-            if ext not in [".pdf", ".txt", ".doc", ".docx"]:
+            if flight is None:
                 yield f"data: Error: Unsupported file type {ext}\n\n"
                 return
 
-            # Extract text
-            yield f"data: Extracting text from file...\n\n"
-            if ext == ".pdf":
-                text = extractor.extract_text_from_pdf(open(file_path, "rb"))
-            elif ext in [".doc", ".docx"]:
-                text = extractor.extract_text_from_doc(open(file_path, "rb"))
-            else:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    text = f.read()
-
-            # Generate title
-            yield f"data: Generating document title...\n\n"
-            title = await mindmap_gen.generate_title(text)
-
-            # Split into chunks
-            yield f"data: Splitting text into chunks...\n\n"
-            chunks = await mindmap_gen.split_text_into_chunks(text, chunk_size=3000)
-
-            # Summarizer
-            summarizer = get_summarizer_llm()
-
-            # Process chunks and generate mindmap (single step update)
-            yield f"data: Generating mindmap data...\n\n"
-            final_graph = await mindmap_gen.process_chunks_and_generate_mindmap(chunks, summarizer, SUMMARY_PROMPT)
+            if not is_leader:
+                yield f"data: Same file is already being processed, joining...\n\n"
 
-            # Done
-            yield f"data: Mindmap generation complete!\n\n"
-            yield f"data: {json.dumps({'graph': final_graph, 'title': title})}\n\n"
+            event_id = 0
+            async for event, payload in until_disconnected(request, flight.subscribe()):
+                yield format_pipeline_event(event, payload, event_id)
+                event_id += 1
 
         except Exception as e:
             logger.error(f"Error generating mindmap from file: {e}", exc_info=True)
-            yield f"data: Error: {str(e)}\n\n"
-
-        finally:
-            # Cleanup temp file
-            try:
-                os.remove(file_path)
-            except Exception as e:
-                logger.warning(f"Failed to delete temp file {file_path}: {e}")
+            yield format_error(f"Error: {str(e)}")
 
     return StreamingResponse(sse_stream(), media_type="text/event-stream")
\ No newline at end of file
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 import httpx
 from urllib.parse import urlparse, urlunparse
+from services import http_client
 
 router = APIRouter()
 
@@ -54,10 +55,12 @@ async def validate_url(request: URLRequest):
     # Step 2: Check reachability
     is_reachable = False
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(url)
-            if response.status_code < 400:
-                is_reachable = True
+        client = http_client.get_client()
+        async with http_client.host_slot(url):
+            # Only the status line matters, so don't download the body
+            async with client.stream("GET", url, timeout=5.0, follow_redirects=False) as response:
+                if response.status_code < 400:
+                    is_reachable = True
     except httpx.RequestError:
         is_reachable = False
 
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+class FileJobRequest(BaseModel):
+    token: str
+
+class JobCreatedResponse(BaseModel):
+    job_id: str
+    created: bool
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    source: str
+    status: str
+    error: str | None = None
+    result: dict | None = None
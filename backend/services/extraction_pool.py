@@ -0,0 +1,119 @@
+# backend/services/extraction_pool.py
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from core.config import settings
+from services import extractor
+from utils.exceptions import ExtractionTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionPool:
+    """
+    Runs blocking extraction (readability, BeautifulSoup, PyMuPDF, python-docx)
+    in a thread or process pool so the event loop keeps serving other streams.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4, timeout: float = 60):
+        self.kind = kind
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.in_flight = 0      # submitted and not finished (queued + running)
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a free worker."""
+        return max(0, self.in_flight - self.max_workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="extract"
+                )
+        return self._executor
+
+    def _on_done(self, future):
+        with self._lock:
+            self.in_flight -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    async def run(self, func: Callable[..., Any], *args, timeout: float | None = None) -> Any:
+        """
+        Run func(*args) in the pool and await the result.
+        Raises ExtractionTimeoutError if it takes longer than the timeout.
+        A queued job is dropped on timeout; a running thread finishes in the background.
+        """
+        future = self._get_executor().submit(func, *args)
+        with self._lock:
+            self.in_flight += 1
+        future.add_done_callback(self._on_done)
+
+        timeout = timeout if timeout is not None else self.timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            logger.warning("Extraction job %s timed out after %.1fs", getattr(func, "__name__", func), timeout)
+            raise ExtractionTimeoutError(f"Text extraction timed out after {timeout:g}s")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timed_out": self.timed_out,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+pool = ExtractionPool(
+    kind=settings.EXTRACTION_POOL_KIND,
+    max_workers=settings.EXTRACTION_MAX_WORKERS,
+    timeout=settings.EXTRACTION_TIMEOUT_SECS,
+)
+
+
+# -----------------------------
+# Async extraction helpers used by the routes
+# -----------------------------
+async def extract_main_html(html: str) -> str:
+    return await pool.run(extractor.extract_main_html, html)
+
+async def extract_text_from_pdf(source) -> str:
+    """source: file path or raw bytes (must be picklable for process pools)."""
+    return await pool.run(extractor.extract_text_from_pdf, source)
+
+async def extract_text_from_doc(source) -> str:
+    """source: file path or raw bytes (must be picklable for process pools)."""
+    return await pool.run(extractor.extract_text_from_doc, source)
+
+async def extract_text_from_txt(source) -> str:
+    return await pool.run(extractor.extract_text_from_txt, source)
@@ -21,24 +21,37 @@ def extract_main_html(html: str) -> str:
 
 def extract_text_from_pdf(pdf_file) -> str:
     """
-    Extracts text from the uploaded PDF file.
+    Extracts text from a PDF file (path, file object or raw bytes).
     """
-    doc = fitz.open(pdf_file)
-    text = ""
-    for page in doc:
-        text += page.get_text("text")  # Extract raw text
-    return text
+    if isinstance(pdf_file, (bytes, bytearray)):
+        doc = fitz.open(stream=pdf_file, filetype="pdf")
+    else:
+        doc = fitz.open(pdf_file)
+    with doc:
+        # Extract raw text
+        return "".join(page.get_text("text") for page in doc)
 
-def extract_text_from_doc(file_bytes: BytesIO) -> str:
+def extract_text_from_doc(file_bytes) -> str:
     """
     Extract text from a DOC or DOCX file.
 
     Args:
-        file_bytes (BytesIO): File content as bytes
+        file_bytes: File path, file object or raw bytes
 
     Returns:
         str: Extracted text
     """
+    if isinstance(file_bytes, (bytes, bytearray)):
+        file_bytes = BytesIO(file_bytes)
     doc = DocxDocument(file_bytes)
     text = "\n".join([para.text for para in doc.paragraphs])
-    return text
\ No newline at end of file
+    return text
+
+def extract_text_from_txt(source) -> str:
+    """
+    Read a plain text / markdown file (path or raw bytes) as UTF-8.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source).decode("utf-8")
+    with open(source, "r", encoding="utf-8") as f:
+        return f.read()
\ No newline at end of file
@@ -1,8 +1,148 @@
 # backend/app/services/fetcher.py
-import httpx
+import codecs
+import logging
+from dataclasses import dataclass
 
-async def fetch_url(url: str) -> str:
-    async with httpx.AsyncClient(follow_redirects=True, timeout=10) as client:
-        response = await client.get(url)
-        response.raise_for_status()
-        return response.text
+from core.config import settings
+from services import http_client
+from utils.cache import Cache
+from utils.exceptions import UnsupportedContentError
+
+logger = logging.getLogger(__name__)
+
+# Content types we can extract text from
+TEXT_CONTENT_TYPES = ("application/xhtml+xml", "application/xml")
+
+# Magic numbers of common binary formats (pdf, zip/docx, images, gzip, media)
+BINARY_SIGNATURES = (
+    b"%PDF", b"PK\x03\x04", b"\x89PNG", b"GIF8", b"\xff\xd8\xff",
+    b"\x1f\x8b", b"RIFF", b"ID3", b"OggS", b"\x00\x00\x01\x00",
+)
+
+SNIFF_BYTES = 512
+
+# Per-URL validators (ETag / Last-Modified), extracted text, content hash and last graph
+source_cache = Cache(
+    ttl_seconds=settings.SOURCE_CACHE_TTL_SECS,
+    max_entries=settings.SOURCE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.SOURCE_CACHE_MAX_BYTES,
+    store_text=True,
+)
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    html: str | None                # None when the server answered 304
+    not_modified: bool = False
+    etag: str | None = None
+    last_modified: str | None = None
+    record: dict | None = None      # previous source_cache entry, if any
+
+
+def is_text_content_type(content_type: str) -> bool:
+    return content_type.startswith("text/") or content_type in TEXT_CONTENT_TYPES
+
+
+def looks_binary(head: bytes) -> bool:
+    """Sniff the first bytes of a body for binary signatures or NUL bytes."""
+    return head.startswith(BINARY_SIGNATURES) or b"\x00" in head
+
+
+def decode_body(body: bytes, charset: str | None) -> str:
+    """Decode with the declared charset, else UTF-8, else Windows-1252."""
+    if charset:
+        try:
+            return body.decode(charset, errors="replace")
+        except LookupError:
+            logger.debug("Unknown charset %s, guessing encoding", charset)
+    try:
+        # Non-final decode drops a multibyte character cut off by FETCH_MAX_BYTES
+        return codecs.getincrementaldecoder("utf-8")().decode(body, final=False)
+    except UnicodeDecodeError:
+        return body.decode("cp1252", errors="replace")
+
+
+async def fetch_page(url: str, max_bytes: int | None = None, revalidate: bool = True) -> FetchedPage:
+    """
+    Stream a page, sending conditional headers when we have validators for it.
+    - On 304 returns not_modified=True with the stored record (no body is read).
+    - Rejects non-text content types (from headers or the first bytes).
+    - Stops reading at max_bytes and returns the bounded prefix.
+    """
+    max_bytes = max_bytes or settings.FETCH_MAX_BYTES
+
+    record = source_cache.get_cache(url) if revalidate else None
+    headers = {}
+    if record:
+        if record.get("etag"):
+            headers["If-None-Match"] = record["etag"]
+        if record.get("last_modified"):
+            headers["If-Modified-Since"] = record["last_modified"]
+
+    # Shared pooled client: keep-alive, TLS session reuse and HTTP/2 across requests
+    client = http_client.get_client()
+    async with http_client.host_slot(url):
+        async with client.stream("GET", url, headers=headers) as response:
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+
+            if response.status_code == 304 and record:
+                logger.info("Not modified: %s", url)
+                return FetchedPage(
+                    url=url,
+                    html=None,
+                    not_modified=True,
+                    etag=etag or record.get("etag"),
+                    last_modified=last_modified or record.get("last_modified"),
+                    record=record,
+                )
+
+            response.raise_for_status()
+
+            content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type and not is_text_content_type(content_type):
+                raise UnsupportedContentError(f"Unsupported content type: {content_type}")
+
+            buffer = bytearray()
+            sniffed = False
+            async for chunk in response.aiter_bytes():
+                buffer += chunk[: max_bytes - len(buffer)]
+
+                if not sniffed and len(buffer) >= SNIFF_BYTES:
+                    sniffed = True
+                    if looks_binary(bytes(buffer[:SNIFF_BYTES])):
+                        raise UnsupportedContentError("URL does not point to a text document")
+
+                if len(buffer) >= max_bytes:
+                    logger.warning("Stopped reading %s at %d bytes", url, max_bytes)
+                    break
+
+            if not sniffed and looks_binary(bytes(buffer[:SNIFF_BYTES])):
+                raise UnsupportedContentError("URL does not point to a text document")
+
+            return FetchedPage(
+                url=url,
+                html=decode_body(bytes(buffer), response.charset_encoding),
+                etag=etag,
+                last_modified=last_modified,
+                record=record,
+            )
+
+
+async def fetch_url(url: str, max_bytes: int | None = None) -> str:
+    """Fetch a page's text unconditionally (no revalidation)."""
+    page = await fetch_page(url, max_bytes=max_bytes, revalidate=False)
+    return page.html
+
+
+def remember_page(page: FetchedPage, text: str, text_hash: str, graph: dict | None = None, title: str | None = None):
+    """Store validators, extracted text and the generated graph for the next revalidation."""
+    source_cache.set_cache(page.url, {
+        "etag": page.etag,
+        "last_modified": page.last_modified,
+        "text": text,
+        "content_hash": text_hash,
+        "graph": graph,
+        "title": title,
+    })
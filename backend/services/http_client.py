@@ -0,0 +1,92 @@
+# backend/services/http_client.py
+import asyncio
+import importlib.util
+import logging
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (compatible; Cognet/0.1)"
+
+# -----------------------------
+# Application-lifetime client
+# -----------------------------
+_client: httpx.AsyncClient | None = None
+
+
+def _http2_enabled() -> bool:
+    if not settings.HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2 is enabled but the 'h2' package is missing; falling back to HTTP/1.1")
+        return False
+    return True
+
+
+def create_client() -> httpx.AsyncClient:
+    """Build the pooled client from settings."""
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECS,
+    )
+    timeout = httpx.Timeout(settings.TIMEOUT_SECS, connect=settings.HTTP_CONNECT_TIMEOUT_SECS)
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=timeout,
+        http2=_http2_enabled(),
+        follow_redirects=True,
+        headers={"User-Agent": USER_AGENT},
+    )
+
+
+def start_client() -> httpx.AsyncClient:
+    """Create the shared client (called from the FastAPI lifespan)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily outside the app (scripts, benchmarks)."""
+    return start_client()
+
+
+async def close_client():
+    """Close the shared client and its connection pool on shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# -----------------------------
+# Per-host connection limit
+# -----------------------------
+_host_slots: dict[str, list] = {}   # host -> [semaphore, users]
+
+
+@asynccontextmanager
+async def host_slot(url: str):
+    """
+    Limit concurrent requests to one host (httpx only limits the total).
+    Entries are dropped once no request for the host is active.
+    """
+    host = urlsplit(url).netloc.lower()
+    entry = _host_slots.get(host)
+    if entry is None:
+        entry = _host_slots[host] = [asyncio.Semaphore(settings.HTTP_MAX_CONNECTIONS_PER_HOST), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            _host_slots.pop(host, None)
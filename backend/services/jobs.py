@@ -0,0 +1,209 @@
+# backend/services/jobs.py
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable
+
+from core.config import settings
+from utils.exceptions import JobQueueFullError
+from utils.job_store import JobStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ActiveJob:
+    key: str
+    factory: Callable[[], AsyncIterator]
+    next_seq: int = 0
+    updated: asyncio.Event = field(default_factory=asyncio.Event)
+    # Published events not yet written to the store, as (seq, event, payload)
+    unflushed: list = field(default_factory=list)
+    flushed_at: float = field(default_factory=time.monotonic)
+
+
+class JobManager:
+    """
+    Background mindmap jobs.
+    - submit() stores the job and queues it; a bounded pool of workers runs the pipelines.
+    - Every pipeline event is appended to the job's log in SQLite, in batches of
+      JOB_EVENT_BATCH (or every JOB_EVENT_FLUSH_SECS) written off the event loop.
+    - events() replays the log after a given id and then follows the job live,
+      so a dropped client can reconnect without restarting the LLM work.
+    - Finished jobs are deleted JOB_TTL_SECS after they end (checked every JOB_PRUNE_SECS).
+    """
+
+    def __init__(self):
+        self.store: JobStore | None = None
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._pruner_task: asyncio.Task | None = None
+        self._active: dict[str, ActiveJob] = {}   # job_id -> running/queued job
+        self._by_key: dict[str, str] = {}         # dedupe key -> job_id
+
+    async def start(self):
+        self.store = JobStore(settings.JOB_DB_PATH)
+        interrupted = self.store.mark_interrupted()
+        if interrupted:
+            logger.warning("Marked %d interrupted jobs as failed", interrupted)
+        self.store.prune(settings.JOB_TTL_SECS)
+
+        self._queue = asyncio.Queue(maxsize=settings.JOB_QUEUE_MAX)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(settings.JOB_WORKERS)
+        ]
+        self._pruner_task = asyncio.create_task(self._pruner(), name="job-pruner")
+
+    async def stop(self):
+        tasks = self._workers + ([self._pruner_task] if self._pruner_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._pruner_task = None
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    # -----------------------------
+    # Submission
+    # -----------------------------
+    def submit(self, kind: str, source: str, key: str, factory: Callable[[], AsyncIterator]) -> tuple[str, bool]:
+        """
+        Queue a pipeline run. Returns (job_id, created).
+        An identical job that is still queued/running is reused instead.
+        """
+        existing = self._by_key.get(key)
+        if existing is not None:
+            return existing, False
+
+        if self._queue.full():
+            raise JobQueueFullError()
+
+        job_id = uuid.uuid4().hex
+        self.store.create_job(job_id, kind, source)
+        self._active[job_id] = ActiveJob(key=key, factory=factory)
+        self._by_key[key] = job_id
+        self._queue.put_nowait(job_id)
+        return job_id, True
+
+    def get(self, job_id: str) -> dict | None:
+        job = self.store.get_job(job_id)
+        if job is None:
+            return None
+        result = self.store.last_event(job_id, "result")
+        return {**job, "result": result}
+
+    # -----------------------------
+    # Workers
+    # -----------------------------
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _pruner(self):
+        while True:
+            await asyncio.sleep(settings.JOB_PRUNE_SECS)
+            try:
+                pruned = await asyncio.to_thread(self.store.prune, settings.JOB_TTL_SECS)
+                if pruned:
+                    logger.info("Pruned %d expired jobs", pruned)
+            except Exception as e:
+                logger.error(f"Job prune failed: {e}", exc_info=True)
+
+    async def _run(self, job_id: str):
+        job = self._active[job_id]
+        self.store.set_status(job_id, "running")
+        try:
+            async for event, payload in job.factory():
+                await self._publish(job_id, job, event, payload)
+            await self._flush(job_id, job)
+            self.store.set_status(job_id, "done")
+        except asyncio.CancelledError:
+            self._flush_now(job_id, job)
+            self.store.set_status(job_id, "failed", "Cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+            job.unflushed.append((job.next_seq, "error", {"message": str(e)}))
+            job.next_seq += 1
+            self._flush_now(job_id, job)
+            self.store.set_status(job_id, "failed", str(e))
+        finally:
+            if self._by_key.get(job.key) == job_id:
+                del self._by_key[job.key]
+            del self._active[job_id]
+            job.updated.set()
+
+    async def _publish(self, job_id: str, job: ActiveJob, event: str, payload):
+        job.unflushed.append((job.next_seq, event, payload))
+        job.next_seq += 1
+        # Wake everyone tailing this job, then arm a fresh event for the next update
+        waiter, job.updated = job.updated, asyncio.Event()
+        waiter.set()
+        if (len(job.unflushed) >= settings.JOB_EVENT_BATCH
+                or time.monotonic() - job.flushed_at >= settings.JOB_EVENT_FLUSH_SECS):
+            await self._flush(job_id, job)
+
+    async def _flush(self, job_id: str, job: ActiveJob):
+        batch = list(job.unflushed)
+        if batch:
+            await asyncio.to_thread(self.store.append_events, job_id, batch)
+            # Tailers read the batch from memory until it is committed
+            del job.unflushed[:len(batch)]
+        job.flushed_at = time.monotonic()
+
+    def _flush_now(self, job_id: str, job: ActiveJob):
+        """Synchronous final flush (for failure/shutdown paths that can't await)."""
+        if job.unflushed:
+            self.store.append_events(job_id, job.unflushed)
+            job.unflushed.clear()
+
+    # -----------------------------
+    # Event replay / tailing
+    # -----------------------------
+    async def events(self, job_id: str, last_event_id: int = -1):
+        """
+        Yield (seq, event, payload) for events after last_event_id, following the
+        job live until it finishes. Yields None every JOB_KEEPALIVE_SECS while idle.
+        """
+        last = last_event_id
+        while True:
+            # Grab the waiter before reading so an update in between isn't missed
+            active = self._active.get(job_id)
+            waiter = active.updated if active else None
+
+            # Unwritten events are snapshotted before the (threaded) store read: a flush
+            # finishing in between moves them into the store, never out of both
+            buffered = list(active.unflushed) if active is not None else []
+            rows = await asyncio.to_thread(self.store.events_after, job_id, last)
+            newest = rows[-1][0] if rows else last
+            rows += [row for row in buffered if row[0] > newest]
+            for seq, event, payload in rows:
+                yield seq, event, payload
+                last = seq
+
+            if waiter is None:
+                # Finished (or unknown): everything is already in the store
+                return
+            try:
+                await asyncio.wait_for(waiter.wait(), timeout=settings.JOB_KEEPALIVE_SECS)
+            except asyncio.TimeoutError:
+                yield None
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self._active),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "workers": len(self._workers),
+        }
+
+
+job_manager = JobManager()
@@ -1,11 +1,15 @@
+import threading
+
+import httpx
 from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
 from core.config import settings
+from services.llm_router import HedgedChatModel, describe_llm, model_id
 
 # -----------------------------
-# Helper function: fresh LLM per call
+# Helper function: build a fresh LLM (the registry below caches them)
 # -----------------------------
-def get_chat_openai(model: str, temperature: float = 0, max_tokens: int = 131000):
+def get_chat_openai(model: str, temperature: float = 0, max_tokens: int | None = 131000, http_async_client=None):
     """
     Returns a fresh ChatOpenAI instance for each call.
     """
@@ -13,7 +17,8 @@ def get_chat_openai(model: str, temperature: float = 0, max_tokens: int = 131000
         model=model,
         temperature=temperature,
         max_tokens=max_tokens,
-        openai_api_key=settings.OPENAI_API_KEY
+        openai_api_key=settings.OPENAI_API_KEY,
+        http_async_client=http_async_client,
     )
 
 def get_chat_gemini(model: str, temperature: float = 0, max_tokens: int = 131000):
@@ -27,29 +32,148 @@ def get_chat_gemini(model: str, temperature: float = 0, max_tokens: int = 131000
         google_api_key=settings.GEMINI_API_KEY
     )
 
+def scheduler_key(llm) -> str | None:
+    """
+    Key for safe_invoke's scheduler, or None for a hedged model
+    (it schedules each provider call itself).
+    """
+    return None if isinstance(llm, HedgedChatModel) else describe_llm(llm)
+
+def model_names(llm) -> list[str]:
+    """Model names behind a chat model (every candidate of a hedged one)."""
+    llms = llm.candidates if isinstance(llm, HedgedChatModel) else [llm]
+    return [model_id(m) for m in llms]
+
+def routed(*candidates):
+    """Hedge across the given models; a single model is returned as-is."""
+    if len(candidates) == 1:
+        return candidates[0]
+    return HedgedChatModel(candidates=candidates)
+
+def _provider_llms(gemini_model: str, openai_model: str, temperature: float, http_async_client=None):
+    """Configured providers (those with an API key), in LLM_PROVIDERS order."""
+    llms = []
+    for name in settings.LLM_PROVIDERS:
+        if name == "gemini" and settings.GEMINI_API_KEY:
+            llms.append(get_chat_gemini(model=gemini_model, temperature=temperature, max_tokens=131000))
+        elif name == "openai" and settings.OPENAI_API_KEY:
+            # OpenAI rejects max_tokens above the model's output limit, so leave it to the API
+            llms.append(get_chat_openai(
+                model=openai_model, temperature=temperature, max_tokens=None, http_async_client=http_async_client
+            ))
+    if not llms:
+        # Nothing configured: keep the old Gemini default so the error names the missing key
+        llms.append(get_chat_gemini(model=gemini_model, temperature=temperature, max_tokens=131000))
+    return llms
+
+# -----------------------------
+# Process-wide registry
+# -----------------------------
+def _settings_signature() -> tuple:
+    """Settings the clients are built from; a change triggers a rebuild."""
+    return (
+        settings.OPENAI_API_KEY, settings.GEMINI_API_KEY,
+        settings.OPENAI_MODEL_SUMMARIZER, settings.OPENAI_MODEL_GRAPH,
+        settings.GEMINI_MODEL_SUMMARIZER, settings.GEMINI_MODEL_GRAPH,
+        tuple(settings.LLM_PROVIDERS),
+    )
+
+
+class LLMRegistry:
+    """
+    Builds each role's chat model ("summarizer", "graph") and its prompt chains
+    once per process, so client setup and connection pools are reused.
+    - OpenAI clients share one httpx pool; Gemini clients keep their own transport alive.
+    - When the relevant settings change, the next lookup rebuilds everything;
+      calls already running keep the instances they started with.
+    - override(role, llm) swaps in another model (benchmarks, local runs).
+    """
+
+    ROLES = {
+        "summarizer": lambda: (settings.GEMINI_MODEL_SUMMARIZER, settings.OPENAI_MODEL_SUMMARIZER, 0.3),
+        "graph": lambda: (settings.GEMINI_MODEL_GRAPH, settings.OPENAI_MODEL_GRAPH, 0),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature = None
+        self._llms: dict[str, object] = {}
+        self._chains: dict[tuple[str, str], object] = {}
+        self._overrides: dict[str, object] = {}
+        self._http: httpx.AsyncClient | None = None
+
+    def _http_client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECS,
+                ),
+                timeout=httpx.Timeout(settings.LLM_HTTP_TIMEOUT_SECS, connect=settings.HTTP_CONNECT_TIMEOUT_SECS),
+            )
+        return self._http
+
+    def _check_signature(self):
+        signature = _settings_signature()
+        if signature != self._signature:
+            self._llms.clear()
+            self._chains.clear()
+            self._signature = signature
+
+    def get(self, role: str):
+        if role in self._overrides:
+            return self._overrides[role]
+        with self._lock:
+            self._check_signature()
+            llm = self._llms.get(role)
+            if llm is None:
+                gemini_model, openai_model, temperature = self.ROLES[role]()
+                llm = self._llms[role] = routed(*_provider_llms(
+                    gemini_model, openai_model, temperature, http_async_client=self._http_client()
+                ))
+            return llm
+
+    def chain(self, role: str, prompt):
+        """prompt | model for a role, built once per prompt text and model."""
+        llm = self.get(role)
+        key = (role, prompt.template)
+        with self._lock:
+            chain = self._chains.get(key)
+            # Compare the bound model too: a reload or override replaces it
+            if chain is None or chain.last is not llm:
+                chain = self._chains[key] = prompt | llm
+            return chain
+
+    def override(self, role: str, llm=None):
+        """Use llm for role from now on; None restores the configured model."""
+        if role not in self.ROLES:
+            raise ValueError(f"Unknown LLM role: {role}")
+        with self._lock:
+            if llm is None:
+                self._overrides.pop(role, None)
+            else:
+                self._overrides[role] = llm
+
+    def reload(self):
+        """Drop cached models and chains; they are rebuilt on next use."""
+        with self._lock:
+            self._signature = None
+            self._check_signature()
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+llm_registry = LLMRegistry()
+
 # -----------------------------
 # Specialized LLM getters
 # -----------------------------
 def get_summarizer_llm():
-    return get_chat_gemini(
-        model=settings.GEMINI_MODEL_SUMMARIZER,
-        temperature=0.3,
-        max_tokens=131000
-    )
-    # return get_chat_openai(
-    #     model=settings.OPENAI_MODEL_SUMMARIZER,
-    #     temperature=0.3,
-    #     max_tokens=131000
-    # )
+    return llm_registry.get("summarizer")
 
 def get_graph_llm():
-    return get_chat_gemini(
-        model=settings.GEMINI_MODEL_GRAPH,
-        temperature=0,
-        max_tokens=131000
-    )
-    # return get_chat_openai(
-    #     model=settings.OPENAI_MODEL_GRAPH,
-    #     temperature=0,
-    #     max_tokens=131000
-    # )
+    return llm_registry.get("graph")
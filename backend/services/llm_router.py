@@ -0,0 +1,241 @@
+# backend/services/llm_router.py
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from core.config import settings
+from utils.llm_scheduler import estimate_tokens, llm_scheduler
+
+
+def model_id(llm) -> str:
+    """Model name of a chat model without a path prefix ("models/gemini-2.0-flash" -> "gemini-2.0-flash")."""
+    model = getattr(llm, "model", None) or getattr(llm, "model_name", None) or ""
+    return model.rsplit("/", 1)[-1]
+
+
+def describe_llm(llm) -> str:
+    """Provider/model identifier of a chat model (used in memo and scheduler keys)."""
+    return f"{type(llm).__name__}:{model_id(llm)}"
+
+
+class LatencyTracker:
+    """Rolling latency percentiles and error rate per provider/model."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._latencies: dict[str, deque] = {}
+        self._outcomes: dict[str, deque] = {}
+        self._cancelled: dict[str, int] = {}
+
+    def record_cancelled(self, key: str):
+        """
+        A call abandoned before it finished (lost a hedge race). Its elapsed time
+        is only a lower bound, so it is counted but kept out of the latency samples.
+        """
+        self._cancelled[key] = self._cancelled.get(key, 0) + 1
+
+    def record(self, key: str, latency: float | None, ok: bool):
+        if latency is not None and ok:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(latency)
+        self._outcomes.setdefault(key, deque(maxlen=self.window)).append(ok)
+
+    def percentile(self, key: str, pct: float) -> float | None:
+        samples = sorted(self._latencies.get(key, ()))
+        if len(samples) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def error_rate(self, key: str) -> float:
+        outcomes = self._outcomes.get(key)
+        if not outcomes:
+            return 0.0
+        return 1 - sum(outcomes) / len(outcomes)
+
+    def score(self, key: str) -> float:
+        """Lower is better: median latency inflated by the error rate."""
+        samples = sorted(self._latencies.get(key, ()))
+        if not samples:
+            # Untried: explore it first; only ever failed: try it last
+            return float("inf") if self.error_rate(key) > 0 else 0.0
+        return samples[len(samples) // 2] * (1 + 4 * self.error_rate(key))
+
+    def stats(self) -> dict:
+        stats = {}
+        for key in self._outcomes.keys() | self._cancelled.keys():
+            samples = sorted(self._latencies.get(key, ()))
+            stats[key] = {
+                "samples": len(samples),
+                "p50_secs": round(samples[len(samples) // 2], 3) if samples else None,
+                "p95_secs": round(samples[int(0.95 * (len(samples) - 1))], 3) if samples else None,
+                "error_rate": round(self.error_rate(key), 3),
+                "cancelled": self._cancelled.get(key, 0),
+            }
+        return stats
+
+
+latency_tracker = LatencyTracker(settings.LLM_ROUTER_WINDOW)
+
+
+class HedgedChatModel(BaseChatModel):
+    """
+    Chat model that routes each call across several providers.
+    - Candidates are ranked by latency_tracker (p50 weighted by error rate).
+    - The best one gets the call; if it hasn't answered by its
+      LLM_HEDGE_PERCENTILE latency (or has failed), the next one is fired too.
+    - The first successful response wins and the others are cancelled.
+    Streams hedge on the first chunk, then stick with the winner.
+    Each candidate call goes through its own provider scheduler.
+    """
+
+    candidates: list[BaseChatModel]
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    @property
+    def model(self) -> str:
+        return "|".join(describe_llm(c) for c in self.candidates)
+
+    def _ranked(self) -> list[BaseChatModel]:
+        # sorted() is stable, so ties keep the configured preference order
+        return sorted(self.candidates, key=lambda c: latency_tracker.score(describe_llm(c)))
+
+    @staticmethod
+    def _hedge_delay(key: str) -> float:
+        delay = latency_tracker.percentile(key, settings.LLM_HEDGE_PERCENTILE)
+        return settings.LLM_HEDGE_DEFAULT_SECS if delay is None else delay
+
+    def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        # Sync path: no hedging, just the best-ranked provider
+        message = self._ranked()[0].invoke(messages, stop=stop, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _call(self, candidate: BaseChatModel, messages, stop, kwargs) -> AIMessage:
+        key = describe_llm(candidate)
+        started = None
+        try:
+            async with llm_scheduler.get(key).slot(estimate_tokens(*(m.content for m in messages))):
+                started = time.monotonic()
+                message = await candidate.ainvoke(messages, stop=stop, **kwargs)
+        except asyncio.CancelledError:
+            if started is not None:
+                latency_tracker.record_cancelled(key)
+            raise
+        except Exception:
+            latency_tracker.record(key, None, ok=False)
+            raise
+        latency_tracker.record(key, time.monotonic() - started, ok=True)
+        return message
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        ranked = self._ranked()
+        message = await self._race(
+            [lambda c=c: self._call(c, messages, stop, kwargs) for c in ranked],
+            [describe_llm(c) for c in ranked],
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _race(self, starters: list, keys: list[str]) -> Any:
+        """
+        Start starters[0]; start the next one whenever the running ones fail or
+        the newest has been running longer than its hedge delay. Return the first
+        result, cancel the rest, and raise the last error if all of them fail.
+        """
+        pending: set[asyncio.Task] = set()
+        next_index = 0
+        last_error: BaseException | None = None
+
+        def launch():
+            nonlocal next_index
+            pending.add(asyncio.create_task(starters[next_index]()))
+            next_index += 1
+
+        try:
+            launch()
+            while pending:
+                can_hedge = settings.LLM_HEDGE_ENABLED and next_index < len(starters)
+                timeout = self._hedge_delay(keys[next_index - 1]) if can_hedge else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                if next_index < len(starters):
+                    # A candidate failed: fail over right away
+                    launch()
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+    async def _first_chunk(self, candidate: BaseChatModel, messages, stop, kwargs):
+        """Open a scheduled stream on candidate and wait for its first chunk."""
+        key = describe_llm(candidate)
+
+        async def stream():
+            async with llm_scheduler.get(key).slot(estimate_tokens(*(m.content for m in messages))):
+                started = time.monotonic()
+                try:
+                    async for chunk in candidate.astream(messages, stop=stop, **kwargs):
+                        yield chunk
+                except (asyncio.CancelledError, GeneratorExit):
+                    # Lost the hedge or closed early: not a completed call
+                    latency_tracker.record_cancelled(key)
+                    raise
+                except Exception:
+                    latency_tracker.record(key, None, ok=False)
+                    raise
+                latency_tracker.record(key, time.monotonic() - started, ok=True)
+
+        agen = stream()
+        try:
+            first = await agen.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except BaseException:
+            await agen.aclose()
+            raise
+        return agen, first
+
+    async def _astream(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        ranked = self._ranked()
+        opened = []
+
+        def starter(candidate):
+            async def start():
+                result = await self._first_chunk(candidate, messages, stop, kwargs)
+                opened.append(result[0])
+                return result
+            return start
+
+        agen = None
+        try:
+            agen, first = await self._race([starter(c) for c in ranked], [describe_llm(c) for c in ranked])
+        finally:
+            for other in opened:
+                # Losers that got their first chunk before they could be cancelled
+                if other is not agen:
+                    await other.aclose()
+
+        try:
+            chunk = first
+            while chunk is not None:
+                yield ChatGenerationChunk(message=chunk)
+                try:
+                    chunk = await agen.__anext__()
+                except StopAsyncIteration:
+                    chunk = None
+        finally:
+            await agen.aclose()
@@ -1,11 +1,23 @@
 # backend/mindmap_generator.py
 from fastapi import HTTPException,UploadFile
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from services.llm import get_graph_llm, get_summarizer_llm
+from services.llm import describe_llm, get_graph_llm, get_summarizer_llm, llm_registry, model_names, scheduler_key
 from langchain.prompts import PromptTemplate
 from utils.llm_handler import LLMTokenExpiredError, safe_invoke
+from utils.llm_scheduler import estimate_tokens
+from utils.cancellation import CancelToken, PipelineCancelledError
+from utils.graph_merge import OrderedMerger, reconcile_roots
+from utils.node_dedup import dedup_similar_nodes
+from utils.memo import chunk_memo, fingerprint
+from utils.json_stream import MindmapJSONStream
+from utils.chunking import chunk_text_by_tokens, chunk_token_budget, count_tokens
 from langchain.schema.runnable import RunnableSequence
 from services import extractor
+from core.config import settings
+import asyncio
+import copy
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
 import json
 import re
 import uuid
@@ -127,129 +139,265 @@ Rules:
 """
 )
 
-def merge_mindmaps(mindmaps: list[dict]) -> dict:
+# ✅ PromptTemplate for summarization
+SUMMARY_PROMPT = PromptTemplate(
+    input_variables=["previous_summary", "current_chunk"],
+    template=(
+        "Summarize the following text, combining with the previous summary:\n\n"
+        "Previous Summary: {previous_summary}\n\n"
+        "Current Chunk: {current_chunk}\n\n"
+        "Summary:"
+    ),
+)
+
+# ✅ PromptTemplate for a chunk summarized on its own (parallel/tree mode, first sequential chunk)
+CHUNK_SUMMARY_PROMPT = PromptTemplate(
+    input_variables=["current_chunk"],
+    template=(
+        "Summarize the following text:\n\n"
+        "Current Chunk: {current_chunk}\n\n"
+        "Summary:"
+    ),
+)
+
+# ✅ PromptTemplate for merging sibling summaries (tree mode)
+MERGE_PROMPT = PromptTemplate(
+    input_variables=["summaries"],
+    template=(
+        "Combine the following consecutive section summaries of one document into a single summary.\n"
+        "Keep the main ideas, key facts and how they relate, in document order. "
+        "Do not add anything that is not in the summaries.\n\n"
+        "Section Summaries:\n{summaries}\n\n"
+        "Summary:"
+    ),
+)
+
+# Prompt versions for the chunk memo: editing a prompt invalidates its entries
+GRAPH_PROMPT_VERSION = fingerprint(GRAPH_PROMPT.template)
+MERGE_PROMPT_VERSION = fingerprint(MERGE_PROMPT.template)
+CHUNK_SUMMARY_PROMPT_VERSION = fingerprint(CHUNK_SUMMARY_PROMPT.template)
+
+def assign_unique_ids(mindmap: dict, chunk_index: int) -> dict:
+    """Give nodes/edges ids that are unique across chunks and re-map edge endpoints."""
+    final_nodes = []
+    final_edges = []
+    node_id_map = {}
+
+    # Assign unique IDs to nodes
+    for node in mindmap.get("nodes", []):
+        old_id = node["id"]
+        new_id = f"chunk{chunk_index}_{uuid.uuid4().hex[:8]}"
+        node_id_map[old_id] = new_id
+        node["id"] = new_id
+        final_nodes.append(node)
+
+    # Assign unique IDs to edges and re-map source/target
+    for edge in mindmap.get("edges", []):
+        edge["id"] = f"edge_{uuid.uuid4().hex[:8]}"
+        edge["source"] = node_id_map.get(edge["source"], edge["source"])
+        edge["target"] = node_id_map.get(edge["target"], edge["target"])
+        final_edges.append(edge)
+
+    return {"nodes": final_nodes, "edges": final_edges}
+
+# Keys a streamed object needs before it can be emitted
+REQUIRED_KEYS = {"node": ("id", "type", "data"), "edge": ("source", "target")}
+
+class ChunkIdRemapper:
     """
-    Merge multiple mindmaps (from different chunks) into one.
-    - Deduplicate root nodes by label (case-insensitive).
-    - Deduplicate sub/detail nodes by (parent_id + label).
-    - Ensure all edges point to the correct merged nodes.
+    assign_unique_ids for streamed output: nodes and edges arrive one by one,
+    so an edge may reference a node id before the node itself is seen.
     """
-    merged_nodes = []
-    merged_edges = []
-
-    # Track unique nodes
-    root_map = {}        # label_lower -> root_id
-    child_map = {}       # (parent_id, label_lower) -> node_id
-    id_remap = {}        # old_id -> new_id
-
-    for mm in mindmaps:
-        for node in mm.get("nodes", []):
-            old_id = node["id"]
-            node_label = node["data"]["label"].strip().lower()
-
-            # ✅ Root deduplication
-            if node["type"] == "root":
-                if node_label in root_map:
-                    id_remap[old_id] = root_map[node_label]
-                    continue
-                else:
-                    root_map[node_label] = old_id
-                    merged_nodes.append(node)
-                    continue
-
-            # ✅ For sub/detail nodes, check if parent exists in edges
-            parent_id = None
-            for e in mm.get("edges", []):
-                if e["target"] == old_id:
-                    parent_id = e["source"]
-                    break
-
-            key = (parent_id, node_label)
-            if parent_id and key in child_map:
-                # Map old_id to existing deduped node
-                id_remap[old_id] = child_map[key]
-                continue
-            else:
-                child_map[key] = old_id
-                merged_nodes.append(node)
-
-        # ✅ Process edges
-        for edge in mm.get("edges", []):
-            edge = edge.copy()
-            if edge["source"] in id_remap:
-                edge["source"] = id_remap[edge["source"]]
-            if edge["target"] in id_remap:
-                edge["target"] = id_remap[edge["target"]]
-
-            # avoid duplicate edges
-            if not any(
-                e["source"] == edge["source"] and e["target"] == edge["target"]
-                for e in merged_edges
-            ):
-                merged_edges.append(edge)
-
-    return {"nodes": merged_nodes, "edges": merged_edges}
+
+    def __init__(self, chunk_index: int):
+        self.chunk_index = chunk_index
+        self.node_ids = {}  # old_id -> new_id
+
+    def node_id(self, old_id: str) -> str:
+        if old_id not in self.node_ids:
+            self.node_ids[old_id] = f"chunk{self.chunk_index}_{uuid.uuid4().hex[:8]}"
+        return self.node_ids[old_id]
+
+    def node(self, node: dict) -> dict:
+        node["id"] = self.node_id(node["id"])
+        return node
+
+    def edge(self, edge: dict) -> dict:
+        edge["id"] = f"edge_{uuid.uuid4().hex[:8]}"
+        edge["source"] = self.node_id(edge["source"])
+        edge["target"] = self.node_id(edge["target"])
+        return edge
+
+def parse_mindmap_json(text: str) -> dict | None:
+    """Extract and parse the JSON block of a graph LLM response."""
+    # Extract JSON block
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if match:
+        text = match.group(0)
+
+    try:
+        return json.loads(text)
+    except Exception as e:
+        logger.warning("JSON parse error: %s", e)
+        return None
+
+@dataclass
+class ChunkRun:
+    """State shared by all chunks of one process_chunks_and_generate_mindmap call."""
+    chain: RunnableSequence
+    # Used instead of chain when there is no previous summary to combine with
+    standalone_chain: RunnableSequence
+    memo_scope: tuple[str, str]
+    llm_key: str | None
+    total: int
+    on_event: Callable[[str, dict], Awaitable[None]] | None = None
+    cancel_token: CancelToken | None = None
+    merger: OrderedMerger = field(default_factory=OrderedMerger)
+    merge_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    async def emit(self, kind: str, payload: dict):
+        if self.on_event is not None:
+            await self.on_event(kind, payload)
+
+    async def chunk_done(self, chunk_index: int, mindmap: dict):
+        """Merge a finished chunk (in chunk order) and report the graph deltas it unlocked."""
+        async with self.merge_lock:
+            for index, delta in self.merger.add(chunk_index, mindmap):
+                await self.emit("delta", {"chunk": index, "total": self.total, **delta})
 
 class MindmapGenerator:
-    def __init__(self):
-        self.llm = get_graph_llm()
+    @property
+    def llm(self):
+        # Looked up per call so a registry reload or override takes effect
+        return get_graph_llm()
 
-    async def generate_chunk_mindmap(self, chunk: str, chunk_index: int) -> dict:
+    async def generate_chunk_mindmap(self, chunk: str, chunk_index: int, cancel_token: CancelToken | None = None) -> dict:
         """Generate mindmap JSON for a single text chunk with unique IDs."""
-        chain = GRAPH_PROMPT | self.llm
+        # ✅ Unchanged chunks are served from the memo instead of the LLM
+        memo_key = chunk_memo.make_key("graph", chunk, GRAPH_PROMPT_VERSION, describe_llm(self.llm))
+        mindmap = chunk_memo.get(memo_key)
+        if mindmap is None:
+            mindmap = await self._invoke_graph_llm(chunk, cancel_token)
+            if mindmap is None:
+                return {"nodes": [], "edges": []}
+            chunk_memo.set(memo_key, mindmap)
+
+        # Memoized graphs are shared, so work on a copy
+        return assign_unique_ids(copy.deepcopy(mindmap), chunk_index)
+
+    async def _invoke_graph_llm(self, chunk: str, cancel_token: CancelToken | None = None) -> dict | None:
+        """Call the graph LLM and parse its JSON (None if unusable)."""
+        chain = llm_registry.chain("graph", GRAPH_PROMPT)
         
         try:
         # ✅ Wrap LLM call with safe_invoke
           response = await safe_invoke(
               chain.ainvoke,
-              {"text": chunk}
+              {"text": chunk},
+              cancel_token=cancel_token,
+              llm_key=scheduler_key(self.llm),
+              kind="graph",
           )
         except LLMTokenExpiredError:
         # Token expired — bubble up so FastAPI can handle
           raise HTTPException(status_code=401, detail="LLM token expired")
 
+        if response is None:
+            return None
+
         text = getattr(response, "content", None) or str(response)
+        return parse_mindmap_json(text)
 
-        # Extract JSON block
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if match:
-            text = match.group(0)
+    async def stream_chunk_mindmap(self, chunk: str, chunk_index: int, on_event, cancel_token: CancelToken | None = None) -> dict:
+        """
+        Streaming variant of generate_chunk_mindmap.
+        Tokens are parsed as they arrive and every node/edge is reported through
+        on_event("node" | "edge", payload) as soon as its JSON object closes;
+        on_event("reset", {"chunk", "reset": True}) retracts them when an attempt fails.
+        """
+        memo_key = chunk_memo.make_key("graph", chunk, GRAPH_PROMPT_VERSION, describe_llm(self.llm))
+        mindmap = chunk_memo.get(memo_key)
+        if mindmap is not None:
+            mindmap = assign_unique_ids(copy.deepcopy(mindmap), chunk_index)
+            for node in mindmap["nodes"]:
+                await on_event("node", {"chunk": chunk_index, "node": node})
+            for edge in mindmap["edges"]:
+                await on_event("edge", {"chunk": chunk_index, "edge": edge})
+            return mindmap
+
+        chain = llm_registry.chain("graph", GRAPH_PROMPT)
+
+        emitted = False
+
+        async def reset():
+            # Retract the nodes/edges a failed attempt already streamed
+            nonlocal emitted
+            if emitted:
+                emitted = False
+                await on_event("reset", {"chunk": chunk_index, "reset": True})
+
+        async def consume():
+            # Fresh state per attempt: a retry supersedes anything emitted before it
+            nonlocal emitted
+            await reset()
+            parser = MindmapJSONStream()
+            remapper = ChunkIdRemapper(chunk_index)
+            raw = {"nodes": [], "edges": []}
+            final = {"nodes": [], "edges": []}
+
+            async for piece in chain.astream({"text": chunk}):
+                content = getattr(piece, "content", None) or ""
+                if not isinstance(content, str):
+                    content = str(content)
+                for kind, obj in parser.feed(content):
+                    if not all(k in obj for k in REQUIRED_KEYS[kind]):
+                        continue
+                    raw[kind + "s"].append(copy.deepcopy(obj))
+                    item = remapper.node(obj) if kind == "node" else remapper.edge(obj)
+                    final[kind + "s"].append(item)
+                    emitted = True
+                    await on_event(kind, {"chunk": chunk_index, kind: item})
+
+            return parser, raw, final
 
         try:
-            mindmap = json.loads(text)
-        except Exception as e:
-            print("JSON parse error:", e)
+        # ✅ Wrap LLM stream with safe_invoke
+          streamed = await safe_invoke(
+              consume,
+              cancel_token=cancel_token,
+              llm_key=scheduler_key(self.llm),
+              est_tokens=estimate_tokens(GRAPH_PROMPT.template, chunk),
+              kind="graph",
+          )
+        except LLMTokenExpiredError:
+        # Token expired — bubble up so FastAPI can handle
+          raise HTTPException(status_code=401, detail="LLM token expired")
+
+        if streamed is None:
+            await reset()
             return {"nodes": [], "edges": []}
 
-        final_nodes = []
-        final_edges = []
-        node_id_map = {}
-
-        # Assign unique IDs to nodes
-        for node in mindmap.get("nodes", []):
-            old_id = node["id"]
-            new_id = f"chunk{chunk_index}_{uuid.uuid4().hex[:8]}"
-            node_id_map[old_id] = new_id
-            node["id"] = new_id
-            final_nodes.append(node)
-
-        # Assign unique IDs to edges and re-map source/target
-        for edge in mindmap.get("edges", []):
-            edge["id"] = f"edge_{uuid.uuid4().hex[:8]}"
-            edge["source"] = node_id_map.get(edge["source"], edge["source"])
-            edge["target"] = node_id_map.get(edge["target"], edge["target"])
-            final_edges.append(edge)
-
-        return {"nodes": final_nodes, "edges": final_edges}
+        parser, raw, final = streamed
+        if not raw["nodes"]:
+            # Nothing recognisable streamed: fall back to parsing the whole completion
+            parsed = parse_mindmap_json(parser.text)
+            if parsed is None:
+                return {"nodes": [], "edges": []}
+            raw = parsed
+            final = assign_unique_ids(copy.deepcopy(parsed), chunk_index)
+
+        chunk_memo.set(memo_key, raw)
+        return final
     
-    async def generate_title(self, text: str) -> str:
+    async def generate_title(self, text: str, cancel_token: CancelToken | None = None) -> str:
         """Generate a short descriptive title for the given text."""
-        summarizer = get_summarizer_llm()
-
-        chain = TITLE_PROMPT | summarizer
+        chain = llm_registry.chain("summarizer", TITLE_PROMPT)
+        summarizer = chain.last
         
         try:
-            response = await safe_invoke(chain.ainvoke, {"text": text})
+            response = await safe_invoke(
+                chain.ainvoke, {"text": text}, cancel_token=cancel_token, llm_key=scheduler_key(summarizer), kind="title"
+            )
         except LLMTokenExpiredError:
             raise HTTPException(status_code=401, detail="LLM token expired")
         
@@ -257,54 +405,257 @@ class MindmapGenerator:
         # Clean title (remove whitespace/newlines)
         return title.strip()
 
-    async def split_text_into_chunks(self, text: str, chunk_size: int = 3000, chunk_overlap:int=200):
-        """Split the text into chunks of a specific size."""
-        splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-        return splitter.split_text(text)
+    async def split_text_into_chunks(self, text: str, chunk_size: int | None = None, chunk_overlap: int | None = None, summarizer=None):
+        """
+        Split the text into chunks.
+        By default (CHUNKER="tokens") chunks are sized in tokens to fill the summarizer's
+        context window next to SUMMARY_PROMPT, the previous summary and the answer.
+        Passing chunk_size (or CHUNKER="chars") uses the character splitter instead.
+        """
+        if chunk_size is not None or settings.CHUNKER == "chars":
+            splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size or settings.CHUNK_SIZE,
+                chunk_overlap=settings.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap,
+            )
+            return splitter.split_text(text)
+
+        models = model_names(summarizer or get_summarizer_llm())
+        reserve = settings.CHUNK_OUTPUT_RESERVE_TOKENS
+        # Room for the prompt, the previous summary (sequential mode) and the answer
+        budget = chunk_token_budget(
+            models,
+            prompt_overhead=count_tokens(SUMMARY_PROMPT.template, models[0]) + reserve,
+            output_reserve=reserve,
+            max_tokens=settings.CHUNK_MAX_TOKENS,
+        )
+        overlap = settings.CHUNK_OVERLAP_TOKENS if chunk_overlap is None else chunk_overlap
+        # Tokenizing a long document is CPU work; keep it off the event loop
+        return await asyncio.to_thread(chunk_text_by_tokens, text, budget, overlap, models[0])
     
+    async def summarize_chunk(self, run: ChunkRun, chunk: str, chunk_index: int, previous_summary: str = "") -> str:
+        """Summarize one chunk (memoized by chunk text, previous summary, prompt and model)."""
+        if previous_summary:
+            memo_key = chunk_memo.make_key("summary", f"{previous_summary}\x1e{chunk}", *run.memo_scope)
+            chain, inputs = run.chain, {"previous_summary": previous_summary, "current_chunk": chunk}
+        else:
+            # No "Previous Summary:" section to leave empty
+            memo_key = chunk_memo.make_key("chunk_summary", chunk, CHUNK_SUMMARY_PROMPT_VERSION, run.memo_scope[1])
+            chain, inputs = run.standalone_chain, {"current_chunk": chunk}
+        cached = chunk_memo.get(memo_key)
+        if cached is not None:
+            return cached
+
+        # ✅ Run summarization with safe_invoke
+        result = await safe_invoke(
+            chain.ainvoke,
+            inputs,
+            cancel_token=run.cancel_token,
+            llm_key=run.llm_key,
+            kind="summary",
+        )
+
+        if result is None:
+            logger.warning(f"Summarization returned None for chunk {chunk_index}")
+            return ""
+
+        summarized_text = (
+            result.content if hasattr(result, "content") else str(result)
+        )
+        chunk_memo.set(memo_key, summarized_text)
+        return summarized_text
+
+    async def merge_summaries(self, run: ChunkRun, summaries: list[str]) -> str:
+        """Merge sibling summaries into their parent's summary (memoized like summarize_chunk)."""
+        if len(summaries) == 1:
+            return summaries[0]
+
+        summarizer_key = run.memo_scope[1]
+        memo_key = chunk_memo.make_key("merge", "\x1e".join(summaries), MERGE_PROMPT_VERSION, summarizer_key)
+        cached = chunk_memo.get(memo_key)
+        if cached is not None:
+            return cached
+
+        numbered = "\n\n".join(f"{i + 1}. {summary}" for i, summary in enumerate(summaries))
+        result = await safe_invoke(
+            llm_registry.chain("summarizer", MERGE_PROMPT).ainvoke,
+            {"summaries": numbered},
+            cancel_token=run.cancel_token,
+            llm_key=run.llm_key,
+            kind="merge",
+        )
+        if result is None:
+            logger.warning("Summary merge failed, concatenating %d summaries instead", len(summaries))
+            return "\n\n".join(summaries)
+
+        merged = result.content if hasattr(result, "content") else str(result)
+        chunk_memo.set(memo_key, merged)
+        return merged
+
+    async def map_summary(self, run: ChunkRun, summarized_text: str, chunk_index: int) -> dict:
+        """Generate the mindmap of one summary (streamed node by node when someone is listening)."""
+        if run.on_event is not None and settings.GRAPH_STREAMING:
+            return await self.stream_chunk_mindmap(summarized_text, chunk_index, run.on_event, run.cancel_token)
+        return await self.generate_chunk_mindmap(summarized_text, chunk_index=chunk_index, cancel_token=run.cancel_token)
+
+    async def summarize_and_map_chunk(self, run: ChunkRun, chunk: str, chunk_index: int, previous_summary: str = ""):
+        """Summarize one chunk, generate its mindmap and merge it. Returns (summary, mindmap)."""
+        if run.cancel_token is not None:
+            # Don't start chunks that were still waiting for a slot
+            run.cancel_token.raise_if_cancelled()
+
+        summarized_text = await self.summarize_chunk(run, chunk, chunk_index, previous_summary)
+        mindmap = await self.map_summary(run, summarized_text, chunk_index)
+
+        await run.chunk_done(chunk_index, mindmap)
+        return summarized_text, mindmap
+
     # calling LLM every chunk
-    async def process_chunks_and_generate_mindmap(self,chunks: list[str], summarizer, prompt_template: PromptTemplate):
+    async def process_chunks_and_generate_mindmap(
+        self,
+        chunks: list[str],
+        summarizer,
+        prompt_template: PromptTemplate,
+        mode: str | None = None,
+        max_concurrency: int | None = None,
+        on_event=None,
+        cancel_token: CancelToken | None = None,
+    ):
         """
-        Summarize text chunks progressively and generate a combined mindmap.
+        Summarize text chunks and generate a combined mindmap.
+        - "parallel": map every chunk independently (bounded concurrency), then reduce.
+        - "sequential": rolling summary, each chunk sees the previous chunk's summary.
+        - "tree": leaves summarized in parallel, then merged TREE_FANOUT at a time
+          level by level into a document summary (LLM depth O(log n)). Each leaf
+          and the document summary get a mindmap (intermediate levels don't, see
+          _process_tree); the document's root becomes the main root.
+        on_event: optional async callback(kind, payload) for live updates:
+          "node"/"edge" as they stream ("reset" retracts a chunk's streamed items
+          before a retry), "delta" as each chunk is merged (in chunk order).
+        cancel_token: cancelling it stops pending LLM calls (PipelineCancelledError).
         """
+        mode = mode or settings.CHUNK_PIPELINE_MODE
+
+        run = ChunkRun(
+            # Build summarization chain once
+            chain=prompt_template | summarizer,
+            standalone_chain=CHUNK_SUMMARY_PROMPT | summarizer,
+            # Memo scope: unchanged chunks with the same prompt + model skip the LLM
+            memo_scope=(fingerprint(prompt_template.template), describe_llm(summarizer)),
+            llm_key=scheduler_key(summarizer),
+            # Tree mode adds the document-level mindmap after the leaves
+            total=len(chunks) + (1 if mode == "tree" else 0),
+            on_event=on_event,
+            cancel_token=cancel_token,
+        )
+
+        if mode == "sequential":
+            await self._process_sequential(chunks, run)
+            # ✅ Chunk graphs were merged one by one into the final graph
+            graph = run.merger.graph()
+        elif mode == "tree":
+            main_root = await self._process_tree(chunks, run, max_concurrency or settings.CHUNK_CONCURRENCY)
+            # ✅ Hang the leaf graphs under the document-level root
+            graph = reconcile_roots(run.merger.graph(), main_root)
+        else:
+            await self._process_parallel(chunks, run, max_concurrency or settings.CHUNK_CONCURRENCY)
+            # ✅ Reduce: reconcile the merged chunk graphs under one root
+            graph = reconcile_roots(run.merger.graph())
+
+        if settings.NODE_DEDUP:
+            # ✅ Collapse near-duplicate labels from different chunks ("Neural Networks" / "Neural networks (NNs)")
+            graph = await asyncio.to_thread(dedup_similar_nodes, graph, settings.NODE_DEDUP_THRESHOLD)
+        return graph
+
+    async def _process_sequential(self, chunks: list[str], run: ChunkRun):
         prev_summary = ""
-        chunk_mindmaps = []  # ✅ Collect all chunk-level mindmaps
-
-        # Build summarization chain once
-        chain: RunnableSequence = prompt_template | summarizer
 
         for i, chunk in enumerate(chunks):
             try:
-                # ✅ Run summarization with safe_invoke
-                result = await safe_invoke(
-                    chain.ainvoke,
-                    {"previous_summary": prev_summary, "current_chunk": chunk}
+                summarized_text, _ = await self.summarize_and_map_chunk(
+                    run, chunk, i, previous_summary=prev_summary
                 )
-
-                if result is None:
-                    logger.warning(f"Summarization returned None for chunk {i}")
-                    summarized_text = ""
-                else:
-                    summarized_text = (
-                        result.content if hasattr(result, "content") else str(result)
-                    )
-
-                # Generate mindmap for this chunk
-                mindmap = await self.generate_chunk_mindmap(
-                    summarized_text, chunk_index=i
-                )
-
-                # ✅ Collect per-chunk mindmap instead of merging here
-                chunk_mindmaps.append(mindmap)
-
                 prev_summary = summarized_text
+            except PipelineCancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Failed processing chunk: {e}", exc_info=True)
                 raise
 
-        # ✅ Merge all collected mindmaps into one final graph
-        final_graph = merge_mindmaps(chunk_mindmaps)
-        return final_graph
+    async def _process_parallel(self, chunks: list[str], run: ChunkRun, max_concurrency: int):
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def process(i: int, chunk: str):
+            async with semaphore:
+                await self.summarize_and_map_chunk(run, chunk, i)
+
+        tasks = [asyncio.create_task(process(i, chunk)) for i, chunk in enumerate(chunks)]
+        try:
+            await asyncio.gather(*tasks)
+        except PipelineCancelledError:
+            logger.info("Chunk processing cancelled: %s", run.cancel_token.reason)
+            raise
+        except Exception as e:
+            logger.error(f"Failed processing chunk: {e}", exc_info=True)
+            raise
+        finally:
+            # Don't leave sibling LLM calls running after a failure or cancellation
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _process_tree(self, chunks: list[str], run: ChunkRun, max_concurrency: int) -> str | None:
+        """
+        Tree reduce. Leaf mindmaps are generated while the summaries are merged
+        upwards; the document mindmap is merged last (index len(chunks)).
+        Returns the merged id of the document root, if it has one.
+        Intermediate merge levels only feed the document summary and get no
+        mindmap of their own: a graph has just root -> sub -> detail, so their
+        nodes could not sit between the document root and the leaf roots and
+        would only repeat the leaves' topics one level up.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        fanout = max(2, settings.TREE_FANOUT)
+
+        async def limited(func, *args):
+            async with semaphore:
+                if run.cancel_token is not None:
+                    run.cancel_token.raise_if_cancelled()
+                return await func(run, *args)
+
+        async def leaf_graph(i: int, summary: str):
+            await run.chunk_done(i, await limited(self.map_summary, summary, i))
+
+        tasks: list[asyncio.Task] = []
+        try:
+            # Level 0: leaf summaries in parallel
+            tasks = [asyncio.create_task(limited(self.summarize_chunk, c, i)) for i, c in enumerate(chunks)]
+            summaries = await asyncio.gather(*tasks)
+
+            # Leaf mindmaps run alongside the merge levels
+            tasks = [asyncio.create_task(leaf_graph(i, s)) for i, s in enumerate(summaries)]
+
+            level = [s for s in summaries if s.strip()] or [""]
+            while len(level) > 1:
+                groups = [level[i:i + fanout] for i in range(0, len(level), fanout)]
+                level = await asyncio.gather(*(limited(self.merge_summaries, g) for g in groups))
+
+            document_index = len(chunks)
+            document_graph = await limited(self.map_summary, level[0], document_index)
+            await asyncio.gather(*tasks)
+            await run.chunk_done(document_index, document_graph)
+        except PipelineCancelledError:
+            logger.info("Chunk processing cancelled: %s", run.cancel_token.reason)
+            raise
+        except Exception as e:
+            logger.error(f"Failed processing chunk: {e}", exc_info=True)
+            raise
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        root = next((n["id"] for n in document_graph["nodes"] if n["type"] == "root"), None)
+        return run.merger.resolve(root) if root else None
 
 
     async def extract_text_from_pdf(file: UploadFile) -> str:
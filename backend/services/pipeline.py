@@ -0,0 +1,294 @@
+# backend/services/pipeline.py
+"""
+Mindmap generation pipelines shared by the POST and SSE routes.
+
+Each pipeline is an async generator of (event, payload) tuples:
+- ("step", "Human readable progress message")
+- ("node" | "edge", {"chunk": index, "node" | "edge": {...}})  live graph output
+- ("reset", {"chunk": index, "reset": True})  drop that chunk's live output (failed LLM attempt)
+- ("delta", {"chunk": index, "total": n, "nodes", "edges", "remap"})  after each chunk merge
+- ("result", {"graph": ..., "title": ..., "cached": bool, "timings"?: {...}})
+- ("queue", {"position": n})  while waiting for admission (see admitted())
+
+Every stage is timed into the metrics of utils/metrics.py; with
+PIPELINE_TIMINGS_IN_RESULT the run's timing summary rides along in the result.
+"""
+import asyncio
+import contextlib
+import functools
+import logging
+import os
+import time
+
+from core.config import settings
+from services import fetcher, extraction_pool, mindmap_generator
+from services.llm import get_summarizer_llm
+from services.mindmap_generator import SUMMARY_PROMPT
+from utils.admission import Ticket, admission, estimate_cost
+from utils.cache import cache, content_hash, file_hash, normalize_key
+from utils.cancellation import CancelToken, PipelineCancelledError
+from utils.dedup import dedup_chunks
+from utils.metrics import PIPELINE_RUNS, PIPELINE_SECONDS, PIPELINES_IN_FLIGHT, stage, track_run
+from utils.uploads import stored_hash, upload_store
+
+logger = logging.getLogger(__name__)
+
+mindmap_gen = mindmap_generator.MindmapGenerator()
+
+
+def step(message: str) -> tuple[str, str]:
+    return ("step", message)
+
+
+# -----------------------------
+# Single-flight keys
+# -----------------------------
+def url_key(url: str) -> str:
+    return "url:" + normalize_key(url)
+
+def file_key(file_hash: str) -> str:
+    return "file:" + file_hash
+
+
+def upload_path(token: str) -> str | None:
+    """Stored file of an upload token, or None if it is malformed or expired."""
+    return upload_store.path(token)
+
+
+def upload_hash(file_path: str) -> str:
+    """Content hash of an upload (stored files are named by it; anything else is hashed)."""
+    return stored_hash(file_path) or file_hash(file_path)
+
+
+async def drop_duplicate_chunks(chunks: list[str]) -> tuple[list[str], int]:
+    """Remove near-duplicate chunks (boilerplate, repeated rows) before any LLM call."""
+    if not settings.CHUNK_DEDUP or len(chunks) < 2:
+        return chunks, 0
+    kept, report = await asyncio.to_thread(dedup_chunks, chunks, settings.CHUNK_DEDUP_THRESHOLD)
+    if report["dropped"]:
+        logger.info("Dropped %d of %d chunks as near-duplicates", report["dropped"], report["total"])
+    return kept, report["dropped"]
+
+
+async def generate_graph(text: str, cancel_token: CancelToken | None = None):
+    """Title + chunking + chunk processing for already extracted text."""
+    yield step("Generating title for the document...")
+    with stage("title"):
+        title = await mindmap_gen.generate_title(text, cancel_token=cancel_token)
+
+    yield step("Splitting text into chunks...")
+    with stage("split"):
+        chunks = await mindmap_gen.split_text_into_chunks(text)
+    with stage("dedup"):
+        chunks, dropped = await drop_duplicate_chunks(chunks)
+    if dropped:
+        yield step(f"Skipped {dropped} near-duplicate chunks")
+
+    # Summarizer
+    summarizer = get_summarizer_llm()
+
+    # Process & generate mindmap, forwarding nodes/edges as they are generated
+    yield step("Generating mindmap data...")
+    final_graph = None
+    with stage("chunks"):
+        async for event in with_live_events(
+            lambda on_event: mindmap_gen.process_chunks_and_generate_mindmap(
+                chunks, summarizer, SUMMARY_PROMPT, on_event=on_event, cancel_token=cancel_token
+            )
+        ):
+            if event[0] == "done":
+                final_graph = event[1]
+            else:
+                yield event
+
+    yield ("result", {"graph": final_graph, "title": title, "cached": False})
+
+
+async def with_live_events(run):
+    """
+    Run run(on_event) in a task and yield every (kind, payload) it reports
+    while it works, then ("done", its return value).
+    """
+    queue = asyncio.Queue()
+    finished = object()
+
+    async def on_event(kind, payload):
+        queue.put_nowait((kind, payload))
+
+    task = asyncio.create_task(run(on_event))
+    task.add_done_callback(lambda _: queue.put_nowait(finished))
+    try:
+        while True:
+            item = await queue.get()
+            if item is finished:
+                break
+            yield item
+        yield ("done", task.result())
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def admitted(ticket: Ticket, events, cancel_token: CancelToken | None = None):
+    """
+    Hold a pipeline until its admission ticket is admitted, reporting the queue
+    position meanwhile, then relay it. The slot is released when it ends.
+    """
+    try:
+        if not ticket.admitted:
+            yield step("Server is busy, waiting for a free slot...")
+            async for position in ticket.wait(cancel_token):
+                yield ("queue", {"position": position})
+        async with contextlib.aclosing(events):
+            async for event in events:
+                yield event
+    finally:
+        ticket.release()
+
+
+def instrumented(source: str):
+    """
+    Count and time every run of a pipeline (runs, in-flight, outcome) and track
+    its stage/LLM timings, attached to the result event when PIPELINE_TIMINGS_IN_RESULT.
+    """
+    def decorate(pipeline_func):
+        @functools.wraps(pipeline_func)
+        async def run(*args, **kwargs):
+            timings = track_run()
+            PIPELINES_IN_FLIGHT.inc(source=source)
+            outcome = "error"
+            try:
+                async with contextlib.aclosing(pipeline_func(*args, **kwargs)) as events:
+                    async for event in events:
+                        if event[0] == "result":
+                            outcome = "cached" if event[1].get("cached") else "ok"
+                            if settings.PIPELINE_TIMINGS_IN_RESULT:
+                                event = ("result", {**event[1], "timings": timings.summary()})
+                        yield event
+            except (PipelineCancelledError, asyncio.CancelledError, GeneratorExit):
+                outcome = "cancelled"
+                raise
+            finally:
+                PIPELINES_IN_FLIGHT.dec(source=source)
+                PIPELINE_RUNS.inc(source=source, outcome=outcome)
+                PIPELINE_SECONDS.observe(time.perf_counter() - timings.started, source=source)
+        return run
+    return decorate
+
+
+@instrumented("url")
+async def url_pipeline(url: str, cancel_token: CancelToken | None = None):
+    """Generate a mindmap for a webpage, reusing cached and unchanged results."""
+    # Step 1: Cache lookup
+    yield step("Checking cache for URL...")
+    with stage("cache"):
+        cached = cache.get_cache(url)
+    if cached:
+        yield step("Cache hit! Returning cached mindmap.")
+        yield ("result", {"graph": cached["graph"], "title": cached.get("title"), "cached": True})
+        return
+
+    # Step 2: Fetch content (conditional request if we've seen this URL before)
+    yield step("Fetching webpage content...")
+    with stage("fetch"):
+        page = await fetcher.fetch_page(url)
+
+    # Step 3: Extract main content (skipped when the page is not modified)
+    if page.not_modified:
+        yield step("Page not modified, reusing extracted content...")
+        text = page.record["text"]
+    else:
+        yield step("Extracting main content from HTML...")
+        with stage("extract"):
+            text = await extraction_pool.extract_main_html(page.html)
+
+    # Steps 4-7: Reuse the previous graph if the content is unchanged
+    text_hash = content_hash(text)
+    record = page.record
+    if record and record.get("content_hash") == text_hash and record.get("graph"):
+        yield step("Content unchanged, reusing previous mindmap...")
+        result = {"graph": record["graph"], "title": record.get("title"), "cached": True}
+    else:
+        result = None
+        async for event in generate_graph(text, cancel_token):
+            if event[0] == "result":
+                result = event[1]
+            else:
+                yield event
+
+    # Step 8: Cache result
+    yield step("Caching generated mindmap...")
+    cache.set_cache(url, {"graph": result["graph"], "text": text, "title": result["title"]})
+    fetcher.remember_page(page, text, text_hash, graph=result["graph"], title=result["title"])
+
+    # Step 9: Done
+    yield step("Done")
+    yield ("result", result)
+
+
+@instrumented("file")
+async def file_pipeline(file_path: str, cleanup: bool = True, cancel_token: CancelToken | None = None):
+    """Generate a mindmap for a file (deleted afterwards if cleanup), reusing the graph of identical content."""
+    try:
+        # Same content processed before (e.g. uploaded twice): reuse its graph
+        yield step("Checking cache for file...")
+        with stage("cache"):
+            key = file_key(upload_hash(file_path))
+            cached = cache.get_cache(key)
+        if cached:
+            yield step("Cache hit! Returning cached mindmap.")
+            yield ("result", {"graph": cached["graph"], "title": cached.get("title"), "cached": True})
+            return
+
+        # Extract text
+        yield step("Extracting text from file...")
+        ext = os.path.splitext(file_path)[1].lower()
+        with stage("extract"):
+            if ext == ".pdf":
+                text = await extraction_pool.extract_text_from_pdf(file_path)
+            elif ext in [".doc", ".docx"]:
+                text = await extraction_pool.extract_text_from_doc(file_path)
+            else:
+                text = await extraction_pool.extract_text_from_txt(file_path)
+
+        async for event in generate_graph(text, cancel_token):
+            if event[0] == "result":
+                cache.set_cache(key, {"graph": event[1]["graph"], "title": event[1]["title"]})
+                yield step("Mindmap generation complete!")
+            yield event
+
+    finally:
+        if cleanup:
+            # Cleanup temp file
+            try:
+                os.remove(file_path)
+            except Exception as e:
+                logger.warning(f"Failed to delete temp file {file_path}: {e}")
+
+
+def admitted_url_pipeline(url: str, cancel_token: CancelToken | None = None, bounded: bool = True):
+    """url_pipeline behind admission control; raises ServerBusyError (503) when the queue is full."""
+    events = url_pipeline(url, cancel_token=cancel_token)
+    if cache.has_cache(url):
+        # Cached results never wait for (or get rejected by) admission
+        return events
+    ticket = admission.reserve(estimate_cost(), bounded=bounded)
+    return admitted(ticket, events, cancel_token)
+
+
+def admitted_file_pipeline(file_path: str, cancel_token: CancelToken | None = None, bounded: bool = True):
+    """file_pipeline behind admission control, costed by the file's size (the upload store keeps the file)."""
+    events = file_pipeline(file_path, cleanup=False, cancel_token=cancel_token)
+    if cache.has_cache(file_key(upload_hash(file_path))):
+        return events
+    ticket = admission.reserve(estimate_cost(file_path), bounded=bounded)
+    return admitted(ticket, events, cancel_token)
+
+
+async def run_to_result(events) -> dict:
+    """Drain a pipeline and return its result payload (for non-streaming routes)."""
+    result = None
+    async for event, payload in events:
+        if event == "result":
+            result = payload
+    return result
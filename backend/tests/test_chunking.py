@@ -0,0 +1,24 @@
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_openai import ChatOpenAI
+
+from services.llm import model_names
+from utils.chunking import DEFAULT_CONTEXT_WINDOW, chunk_token_budget, context_window
+
+
+def test_context_window_strips_models_prefix():
+    assert context_window("models/gemini-2.0-flash-lite") == 1048576
+    assert context_window("gemini-2.0-flash") == 1048576
+    assert context_window("gpt-4o-2024-08-06") == 128000
+    assert context_window("unknown-model") == DEFAULT_CONTEXT_WINDOW
+
+
+def test_gemini_chunk_budget_uses_its_context_window():
+    gemini = ChatGoogleGenerativeAI(model="gemini-2.0-flash-lite", google_api_key="test")
+    assert gemini.model == "models/gemini-2.0-flash-lite"
+    assert model_names(gemini) == ["gemini-2.0-flash-lite"]
+    assert chunk_token_budget(model_names(gemini), 500, 2000, 6000) == 6000
+
+
+def test_chunk_budget_is_bounded_by_the_smallest_window():
+    gpt4 = ChatOpenAI(model="gpt-4", api_key="test")
+    assert chunk_token_budget(model_names(gpt4), 500, 2000, 6000) == 8192 - 2500
@@ -0,0 +1,102 @@
+import asyncio
+
+from core.config import settings
+from services.jobs import JobManager
+from utils.job_store import JobStore
+
+
+def test_append_events_skips_rows_already_stored():
+    store = JobStore(":memory:")
+    store.create_job("j", "url", "https://example.com")
+    store.append_events("j", [(0, "step", "a"), (1, "step", "b")])
+    store.append_events("j", [(1, "step", "b"), (2, "result", {"graph": {}})])
+    assert [seq for seq, _, _ in store.events_after("j")] == [0, 1, 2]
+
+
+def test_cancelled_job_is_marked_failed_after_a_committed_flush(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_DB_PATH", ":memory:")
+    monkeypatch.setattr(settings, "JOB_EVENT_BATCH", 2)
+
+    async def main():
+        manager = JobManager()
+        await manager.start()
+        started = asyncio.Event()
+
+        async def pipeline():
+            yield ("step", "a")
+            yield ("step", "b")   # second event triggers a flush of both
+            started.set()
+            await asyncio.sleep(10)
+            yield ("result", {})
+
+        job_id, _ = manager.submit("url", "https://example.com", "k", pipeline)
+        await started.wait()
+        # Simulate a cancellation that lands after the flush thread committed but
+        # before the buffer was trimmed: the rows are both stored and still buffered
+        job = manager._active[job_id]
+        job.unflushed[:] = [(0, "step", "a"), (1, "step", "b")]
+        for task in manager._workers:
+            task.cancel()
+        await asyncio.gather(*manager._workers, return_exceptions=True)
+        status = manager.store.get_job(job_id)["status"]
+        events = manager.store.events_after(job_id)
+        await manager.stop()
+        return status, events
+
+    status, events = asyncio.run(main())
+    assert status == "failed"
+    assert [seq for seq, _, _ in events] == [0, 1]
+
+
+def test_job_events_are_replayed_from_store_and_memory(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_DB_PATH", ":memory:")
+    monkeypatch.setattr(settings, "JOB_EVENT_BATCH", 3)
+    monkeypatch.setattr(settings, "JOB_EVENT_FLUSH_SECS", 60)
+
+    async def main():
+        manager = JobManager()
+        await manager.start()
+
+        async def pipeline():
+            for i in range(7):
+                yield ("delta", {"i": i})
+                await asyncio.sleep(0)
+            yield ("result", {"graph": {}})
+
+        job_id, _ = manager.submit("url", "https://example.com", "k", pipeline)
+        seqs = [item[0] async for item in manager.events(job_id) if item is not None]
+        job = manager.get(job_id)
+        await manager.stop()
+        return seqs, job
+
+    seqs, job = asyncio.run(main())
+    assert seqs == list(range(8))
+    assert job["status"] == "done" and job["result"] == {"graph": {}}
+
+
+def test_concurrent_followers_see_every_event_once(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_DB_PATH", ":memory:")
+    monkeypatch.setattr(settings, "JOB_EVENT_BATCH", 4)
+    monkeypatch.setattr(settings, "JOB_EVENT_FLUSH_SECS", 0.001)
+
+    async def main():
+        manager = JobManager()
+        await manager.start()
+
+        async def pipeline():
+            for i in range(40):
+                yield ("delta", {"i": i})
+                await asyncio.sleep(0.001)
+            yield ("result", {"graph": {}})
+
+        job_id, _ = manager.submit("url", "https://example.com", "k", pipeline)
+
+        async def follow():
+            return [item[0] async for item in manager.events(job_id) if item is not None]
+
+        results = await asyncio.gather(*(follow() for _ in range(20)))
+        await manager.stop()
+        return results
+
+    for seqs in asyncio.run(main()):
+        assert seqs == list(range(41))
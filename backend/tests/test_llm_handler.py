@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from utils import llm_handler
+from utils.llm_handler import LLMTokenExpiredError, safe_invoke
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_handler, "backoff_delay", lambda attempt, base=None: 0)
+
+
+def failing(*errors):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+
+    return call, calls
+
+
+def test_deadline_expired_is_retried_not_an_auth_error():
+    call, calls = failing(Exception("504 Deadline Expired before operation could complete"))
+    assert asyncio.run(safe_invoke(call, llm_key=None)) == "ok"
+    assert len(calls) == 2
+
+
+def test_quota_errors_mentioning_tokens_are_rate_limits():
+    call, calls = failing(Exception("429 RESOURCE_EXHAUSTED: input_token_count exceeds quota"))
+    assert asyncio.run(safe_invoke(call, llm_key=None)) == "ok"
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("message", ["Error code: 401 - Unauthorized", "API key expired. Please renew the API key."])
+def test_auth_errors_are_not_retried(message):
+    call, calls = failing(Exception(message))
+    with pytest.raises(LLMTokenExpiredError):
+        asyncio.run(safe_invoke(call, llm_key=None))
+    assert len(calls) == 1
@@ -0,0 +1,45 @@
+import asyncio
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from core.config import settings
+from services import llm_router
+from services.llm_router import HedgedChatModel, LatencyTracker
+
+
+class SleepyChatModel(BaseChatModel):
+    model: str
+    delay: float
+
+    @property
+    def _llm_type(self) -> str:
+        return "sleepy"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.model))])
+
+
+def test_hedge_losers_are_not_recorded_as_completed_calls(monkeypatch):
+    tracker = LatencyTracker(window=50)
+    monkeypatch.setattr(llm_router, "latency_tracker", tracker)
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_DEFAULT_SECS", 0.02)
+
+    slow = SleepyChatModel(model="slow", delay=1.0)
+    fast = SleepyChatModel(model="fast", delay=0.01)
+    hedged = HedgedChatModel(candidates=[slow, fast])
+
+    reply = asyncio.run(hedged.ainvoke([HumanMessage(content="hi")]))
+
+    assert reply.content == "fast"
+    stats = tracker.stats()
+    assert stats["SleepyChatModel:slow"]["samples"] == 0
+    assert stats["SleepyChatModel:slow"]["cancelled"] == 1
+    assert stats["SleepyChatModel:slow"]["error_rate"] == 0
+    assert stats["SleepyChatModel:fast"]["samples"] == 1
@@ -0,0 +1,25 @@
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from core.config import settings
+from services.llm import scheduler_key
+from utils.llm_scheduler import LLMScheduler
+
+
+def test_documented_rate_limit_key_matches_a_real_gemini_model(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RATE_LIMITS", {"ChatGoogleGenerativeAI:gemini-2.0-flash": {"rpm": 15, "tpm": 1000}})
+    gemini = ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key="test")
+
+    key = scheduler_key(gemini)
+    assert key == "ChatGoogleGenerativeAI:gemini-2.0-flash"
+    assert LLMScheduler._limits_for(key) == (15, 1000)
+
+
+def test_rate_limit_keys_may_use_the_models_prefix(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RATE_LIMITS", {"ChatGoogleGenerativeAI:models/gemini-2.0-flash-lite": {"rpm": 30}})
+    gemini = ChatGoogleGenerativeAI(model="gemini-2.0-flash-lite", google_api_key="test")
+    assert LLMScheduler._limits_for(scheduler_key(gemini)) == (30, None)
+
+
+def test_unmatched_keys_use_the_defaults(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RATE_LIMITS", {"ChatOpenAI:gpt-4o": {"rpm": 5}})
+    assert LLMScheduler._limits_for("ChatGoogleGenerativeAI:gemini-2.0-flash") == (settings.LLM_RPM, settings.LLM_TPM)
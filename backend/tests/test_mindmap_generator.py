@@ -0,0 +1,44 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from core.config import Settings
+from services import mindmap_generator
+from services.mindmap_generator import SUMMARY_PROMPT, MindmapGenerator
+
+
+def test_default_chunk_pipeline_mode_is_parallel(monkeypatch):
+    monkeypatch.delenv("CHUNK_PIPELINE_MODE", raising=False)
+    assert Settings(_env_file=None).CHUNK_PIPELINE_MODE == "parallel"
+
+
+def test_previous_summary_section_only_when_there_is_one(monkeypatch):
+    prompts = []
+
+    def summarizer(prompt):
+        prompts.append(prompt.to_string())
+        return AIMessage(content=f"summary {len(prompts)}")
+
+    generator = MindmapGenerator()
+
+    async def no_graph(run, summary, chunk_index):
+        return {"nodes": [], "edges": []}
+
+    monkeypatch.setattr(generator, "map_summary", no_graph)
+    monkeypatch.setattr(mindmap_generator.chunk_memo, "get", lambda key: None)
+    monkeypatch.setattr(mindmap_generator, "describe_llm", lambda llm: "fake")
+    monkeypatch.setattr(mindmap_generator, "scheduler_key", lambda llm: None)
+
+    for mode in ("parallel", "sequential"):
+        prompts.clear()
+        asyncio.run(generator.process_chunks_and_generate_mindmap(
+            ["first chunk", "second chunk"], RunnableLambda(summarizer), SUMMARY_PROMPT, mode=mode,
+        ))
+        with_previous = [p for p in prompts if "Previous Summary" in p]
+        if mode == "parallel":
+            assert with_previous == []
+        else:
+            # Only the second chunk has a summary to build on
+            assert len(with_previous) == 1 and "Previous Summary: summary 1" in with_previous[0]
+        assert len(prompts) == 2
@@ -0,0 +1,44 @@
+import pytest
+
+from core.config import settings
+from utils.node_dedup import dedup_similar_nodes
+
+pytest.importorskip("numpy")
+
+
+def node(node_id: str, node_type: str, label: str) -> dict:
+    return {"id": node_id, "type": node_type, "data": {"label": label, "content": ""}}
+
+
+def edge(source: str, target: str) -> dict:
+    return {"id": f"{source}-{target}", "source": source, "target": target}
+
+
+def test_never_merges_a_node_into_its_ancestor():
+    graph = {
+        "nodes": [node("r", "root", "ML"), node("A", "sub", "Neural Networks"),
+                  node("B", "sub", "Training"), node("C", "sub", "Neural networks (NNs)")],
+        "edges": [edge("r", "A"), edge("A", "B"), edge("B", "C")],
+    }
+    out = dedup_similar_nodes(graph, 0.8)
+    assert {n["id"] for n in out["nodes"]} == {"r", "A", "B", "C"}
+
+
+def test_merges_unrelated_duplicates_among_many_nodes():
+    nodes = [node("r", "root", "Doc")] + [node(f"n{i}", "sub", f"Topic number {i} overview") for i in range(300)]
+    nodes.append(node("dup", "sub", "Topic Number 7 Overview"))
+    edges = [edge("r", n["id"]) for n in nodes[1:]]
+    out = dedup_similar_nodes({"nodes": nodes, "edges": edges}, 0.95)
+    ids = {n["id"] for n in out["nodes"]}
+    assert "dup" not in ids and "n7" in ids
+    assert len(ids) == len(nodes) - 1
+
+
+def test_node_types_over_the_cap_are_skipped(monkeypatch):
+    monkeypatch.setattr(settings, "NODE_DEDUP_MAX_NODES", 2)
+    graph = {
+        "nodes": [node("r", "root", "ML"), node("A", "sub", "Neural Networks"),
+                  node("B", "sub", "Neural networks"), node("C", "sub", "Other")],
+        "edges": [edge("r", "A"), edge("r", "B"), edge("r", "C")],
+    }
+    assert dedup_similar_nodes(graph, 0.8) is graph
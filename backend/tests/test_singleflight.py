@@ -0,0 +1,40 @@
+import asyncio
+
+from core.config import settings
+from utils.singleflight import SingleFlight
+
+
+def delta(chunk: int, total: int):
+    return ("delta", {"chunk": chunk, "total": total})
+
+
+def run_flight(monkeypatch, progress_during_grace: int):
+    """Start a 10-chunk flight nobody subscribes to; report progress_during_grace chunks inside the grace period."""
+    monkeypatch.setattr(settings, "CANCEL_ON_DISCONNECT", True)
+    monkeypatch.setattr(settings, "CANCEL_GRACE_SECS", 0.1)
+    monkeypatch.setattr(settings, "CANCEL_KEEP_PROGRESS", 0.8)
+
+    async def main():
+        async def source(token):
+            for i in range(progress_during_grace):
+                yield delta(i, 10)
+            await token.run(asyncio.sleep(0.3))
+            yield ("result", {})
+
+        flight, _ = SingleFlight().join("k", source)
+        await asyncio.gather(flight.task, return_exceptions=True)
+        return flight
+
+    return asyncio.run(main())
+
+
+def test_flight_without_subscribers_is_cancelled_after_the_grace_period(monkeypatch):
+    flight = run_flight(monkeypatch, progress_during_grace=2)
+    assert flight.cancel_token.cancelled
+    assert flight.events[-1] != ("result", {})
+
+
+def test_flight_that_passes_keep_progress_during_grace_is_finished(monkeypatch):
+    flight = run_flight(monkeypatch, progress_during_grace=9)
+    assert not flight.cancel_token.cancelled
+    assert flight.events[-1] == ("result", {})
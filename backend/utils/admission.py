@@ -0,0 +1,167 @@
+# backend/utils/admission.py
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import AsyncIterator
+
+from core.config import settings
+from utils.cancellation import CancelToken
+from utils.exceptions import ServerBusyError
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_cost(file_path: str | None = None, size: int | None = None) -> float:
+    """Rough number of chunks a generation will process (a webpage without a size gets ADMISSION_URL_COST)."""
+    if file_path is not None:
+        size = os.path.getsize(file_path)
+    if not size:
+        return float(settings.ADMISSION_URL_COST)
+    return max(1.0, size / settings.ADMISSION_BYTES_PER_COST)
+
+
+class Ticket:
+    """A reserved place in the AdmissionController: queued until admitted, then running until released."""
+
+    def __init__(self, controller: "AdmissionController", cost: float):
+        self._controller = controller
+        self.cost = cost
+        self.enqueued_at = time.monotonic()
+        # Weighted fair order: small jobs overtake big ones, but every job ages toward the front
+        self.score = self.enqueued_at + cost * settings.ADMISSION_SECS_PER_COST
+        self.admitted_at: float | None = None
+        self.released = False
+
+    @property
+    def admitted(self) -> bool:
+        return self.admitted_at is not None
+
+    def position(self) -> int:
+        """1-based place in the wait queue (0 once admitted)."""
+        return self._controller.position(self)
+
+    async def wait(self, cancel_token: CancelToken | None = None) -> AsyncIterator[int]:
+        """Yield the queue position whenever it changes, until the ticket is admitted."""
+        last = None
+        while not self.admitted:
+            # Grab the event before yielding so a change while the caller handles it isn't missed
+            changed = self._controller.changed
+            position = self.position()
+            if position != last:
+                last = position
+                yield position
+            if self.admitted:
+                break
+            if cancel_token is not None:
+                await cancel_token.run(changed.wait())
+            else:
+                await changed.wait()
+
+    async def acquire(self, cancel_token: CancelToken | None = None):
+        async for _ in self.wait(cancel_token):
+            pass
+
+    def release(self):
+        """Give up the slot (or the place in the queue). Safe to call more than once."""
+        if not self.released:
+            self.released = True
+            self._controller.release(self)
+
+
+class AdmissionController:
+    """
+    Global cap on concurrently running generations with a bounded wait queue.
+    - reserve(cost) runs the job now, queues it, or rejects it immediately with
+      ServerBusyError (503 + Retry-After) when the queue is full.
+    - Waiting tickets are ordered by arrival time + cost * ADMISSION_SECS_PER_COST.
+    - Retry-After is estimated from recent run durations and the queue length.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.running = 0
+        self._waiting: list[Ticket] = []
+        self.changed = asyncio.Event()
+
+        # Metrics
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.run_avg: float | None = None   # EWMA of admitted -> released seconds
+
+    def reserve(self, cost: float = 1.0, bounded: bool = True) -> Ticket:
+        """
+        Take a ticket for a job of the given cost. bounded=False queues even when
+        the queue is full (for callers that already bound their own backlog).
+        """
+        ticket = Ticket(self, cost)
+        if self.running < self.max_concurrent and not self._waiting:
+            self._admit(ticket)
+        elif bounded and len(self._waiting) >= self.max_queued:
+            self.rejected += 1
+            retry_after = self.retry_after()
+            logger.warning("Admission queue full (%d waiting), rejecting for %ds", len(self._waiting), retry_after)
+            raise ServerBusyError(retry_after=retry_after)
+        else:
+            self._waiting.append(ticket)
+            self._waiting.sort(key=lambda t: t.score)
+            self._notify()
+        return ticket
+
+    def position(self, ticket: Ticket) -> int:
+        if ticket.admitted:
+            return 0
+        try:
+            return self._waiting.index(ticket) + 1
+        except ValueError:
+            return 0
+
+    def release(self, ticket: Ticket):
+        if ticket.admitted:
+            self.running -= 1
+            elapsed = time.monotonic() - ticket.admitted_at
+            self.run_avg = elapsed if self.run_avg is None else 0.8 * self.run_avg + 0.2 * elapsed
+        elif ticket in self._waiting:
+            # Gave up while queued
+            self._waiting.remove(ticket)
+        while self._waiting and self.running < self.max_concurrent:
+            self._admit(self._waiting.pop(0))
+        self._notify()
+
+    def retry_after(self) -> int:
+        if self.run_avg is None:
+            return settings.ADMISSION_RETRY_AFTER_SECS
+        rounds = (len(self._waiting) + 1) / self.max_concurrent
+        return min(600, max(1, math.ceil(self.run_avg * rounds)))
+
+    def _admit(self, ticket: Ticket):
+        ticket.admitted_at = time.monotonic()
+        self.running += 1
+        self.admitted += 1
+        self.wait_total += ticket.admitted_at - ticket.enqueued_at
+
+    def _notify(self):
+        # Wake every waiter, then arm a fresh event for the next change
+        waiter, self.changed = self.changed, asyncio.Event()
+        waiter.set()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "running": self.running,
+            "queued": len(self._waiting),
+            "queued_cost": round(sum(t.cost for t in self._waiting), 1),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_wait_secs": round(self.wait_total / self.admitted, 3) if self.admitted else 0.0,
+            "avg_run_secs": round(self.run_avg, 3) if self.run_avg is not None else None,
+        }
+
+
+admission = AdmissionController(
+    max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+    max_queued=settings.ADMISSION_MAX_QUEUED,
+)
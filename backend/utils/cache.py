@@ -1,28 +1,179 @@
 # backend/utils/cache.py
 import time
+import json
 import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_key(key: str) -> str:
+    """
+    Normalize a cache key so equivalent inputs share one entry.
+    - Strip surrounding whitespace
+    - For http(s) URLs: lowercase scheme/host, drop fragment and trailing slash
+    """
+    key = key.strip()
+    parts = urlsplit(key)
+    if parts.scheme.lower() in ("http", "https") and parts.netloc:
+        path = parts.path.rstrip("/")
+        key = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+    return key
+
+
+def hash_key(key: str) -> str:
+    """Hash a normalized key (keeps long keys like file contents small)."""
+    return hashlib.sha256(normalize_key(key).encode()).hexdigest()
+
+
+def content_hash(data: str | bytes) -> str:
+    """Stable hash of document content (used to detect unchanged sources)."""
+    if isinstance(data, str):
+        data = data.encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path: str, block_size: int = 64 * 1024) -> str:
+    """Content hash of a file on disk, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def approx_size(value) -> int:
+    """Approximate memory footprint of a cached value in bytes."""
+    try:
+        return len(json.dumps(value, default=str).encode())
+    except (TypeError, ValueError):
+        return len(str(value).encode())
+
 
 class Cache:
-    def __init__(self, ttl_seconds=3600):
-        self.store = {}  # {key: (value, expiry_timestamp)}
+    """
+    In-memory LRU cache with TTL, bounded by entry count and approximate bytes.
+    Keys are normalized and hashed the same way on every read and write.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds=3600,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        store_text: bool = False,
+    ):
+        self.store = OrderedDict()  # {key_hash: (value, expiry_timestamp, size)}
         self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store_text = store_text
+        self.current_bytes = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._lock = threading.Lock()
 
     def get_cache(self, key):
         """Return cached value if valid, else None"""
-        item = self.store.get(key)
-        if item:
-            value, expiry = item
-            if expiry > time.time():
-                return value
-            else:
-                del self.store[key]
+        key_hash = hash_key(key)
+        with self._lock:
+            item = self.store.get(key_hash)
+            if item:
+                value, expiry, _ = item
+                if expiry > time.time():
+                    self.store.move_to_end(key_hash)
+                    self.hits += 1
+                    return value
+                self._remove(key_hash)
+                self.expirations += 1
+            self.misses += 1
         return None
 
+    def has_cache(self, key) -> bool:
+        """Whether key holds a valid entry (without counting a hit or miss)"""
+        with self._lock:
+            item = self.store.get(hash_key(key))
+            return bool(item) and item[1] > time.time()
+
     def set_cache(self, key, value):
-        """Store value with TTL"""
-        # Use a hash of the key to handle larger PDFs gracefully
-        key_hash = hashlib.sha256(key.encode()).hexdigest()
+        """Store value with TTL, evicting least recently used entries if needed"""
+        if not self.store_text and isinstance(value, dict) and "text" in value:
+            value = {k: v for k, v in value.items() if k != "text"}
+
+        size = approx_size(value)
+        if size > self.max_bytes:
+            logger.warning("Skipping cache entry of %d bytes (limit %d)", size, self.max_bytes)
+            return
+
+        key_hash = hash_key(key)
         expiry = time.time() + self.ttl
-        self.store[key_hash] = (value, expiry)
+        with self._lock:
+            if key_hash in self.store:
+                self._remove(key_hash)
+            self.store[key_hash] = (value, expiry, size)
+            self.current_bytes += size
+            self._evict()
+
+    def delete_cache(self, key):
+        """Remove a key if present"""
+        with self._lock:
+            key_hash = hash_key(key)
+            if key_hash in self.store:
+                self._remove(key_hash)
+
+    def clear(self):
+        with self._lock:
+            self.store.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters and current usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.store),
+                "bytes": self.current_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key_hash):
+        _, _, size = self.store.pop(key_hash)
+        self.current_bytes -= size
+
+    def _evict(self):
+        """Drop expired entries first, then LRU entries until within bounds"""
+        now = time.time()
+        for key_hash in [k for k, (_, expiry, _) in self.store.items() if expiry <= now]:
+            self._remove(key_hash)
+            self.expirations += 1
+
+        while self.store and (
+            len(self.store) > self.max_entries or self.current_bytes > self.max_bytes
+        ):
+            key_hash = next(iter(self.store))
+            self._remove(key_hash)
+            self.evictions += 1
+
 
-cache = Cache(ttl_seconds=3600)  # 1 hour default
+cache = Cache(
+    ttl_seconds=settings.CACHE_TTL_SECS,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    max_bytes=settings.CACHE_MAX_BYTES,
+    store_text=settings.CACHE_STORE_TEXT,
+)
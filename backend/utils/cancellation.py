@@ -0,0 +1,53 @@
+# backend/utils/cancellation.py
+import asyncio
+from typing import Any, Awaitable
+
+
+class PipelineCancelledError(Exception):
+    """Raised inside a pipeline once its CancelToken has been cancelled."""
+
+
+class CancelToken:
+    """
+    Cooperative cancellation shared by one pipeline run.
+    The owner calls cancel(); LLM calls awaited through run() are cancelled
+    immediately and raise PipelineCancelledError.
+    """
+
+    def __init__(self):
+        self._event = asyncio.Event()
+        self.reason: str | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled"):
+        if not self.cancelled:
+            self.reason = reason
+            self._event.set()
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise PipelineCancelledError(self.reason)
+
+    async def run(self, awaitable: Awaitable) -> Any:
+        """Await awaitable, cancelling it as soon as the token is cancelled."""
+        task = asyncio.ensure_future(awaitable)
+        if self.cancelled:
+            task.cancel()
+            self.raise_if_cancelled()
+
+        waiter = asyncio.ensure_future(self._event.wait())
+        try:
+            await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+            if not task.done():
+                task.cancel()
+                # Let the cancellation land before looking at the outcome
+                await asyncio.wait({task})
+
+        if task.cancelled():
+            self.raise_if_cancelled()
+        return task.result()
@@ -1,3 +1,28 @@
+import logging
+import re
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a chars/4 estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Context windows (tokens) of the models we route to; unknown models use DEFAULT_CONTEXT_WINDOW
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4": 8192,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gemini-2.0-flash": 1048576,
+    "gemini-2.0-flash-lite": 1048576,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+HEADING_RE = re.compile(r"^#{1,6}\s+\S")   # markdown headings
+SENTENCE_RE = re.compile(r"(?<=[.!?。！？])\s+")
+
+
 def chunk_text_by_size(text: str, max_chars: int = 3000):
     """
     Very simple chunker by approximate characters. Replace with token-aware chunker later.
@@ -20,3 +45,171 @@ def chunk_text_by_size(text: str, max_chars: int = 3000):
     if current.strip():
         chunks.append(current.strip())
     return chunks
+
+
+# -----------------------------
+# Token counting
+# -----------------------------
+@lru_cache(maxsize=16)
+def get_encoding(model: str | None = None):
+    """
+    Tokenizer for model (cached); cl100k_base for models tiktoken doesn't know (e.g. Gemini).
+    None (chars/4 estimates) without tiktoken or when its encoding can't be loaded.
+    """
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else _default_encoding()
+    except KeyError:
+        return _default_encoding()
+    except Exception as e:
+        # The model's encoding file couldn't be downloaded (offline, firewalled)
+        logger.warning("Could not load the tiktoken encoding for %s (%s); trying cl100k_base", model, e)
+        return _default_encoding()
+
+
+@lru_cache(maxsize=1)
+def _default_encoding():
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Cached, so this is logged once per process
+        logger.warning("Could not load the tiktoken cl100k_base encoding (%s); estimating tokens as chars/4", e)
+        return None
+
+
+def count_tokens(text: str, model: str | None = None) -> int:
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def context_window(model: str | None) -> int:
+    if not model:
+        return DEFAULT_CONTEXT_WINDOW
+    # Gemini reports "models/gemini-2.0-flash"; match on the bare name
+    model = model.rsplit("/", 1)[-1]
+    # Longest known prefix, so dated variants ("gpt-4o-2024-08-06") resolve too
+    matches = [name for name in MODEL_CONTEXT_WINDOWS if model.startswith(name)]
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)] if matches else DEFAULT_CONTEXT_WINDOW
+
+
+def chunk_token_budget(models: list[str], prompt_overhead: int, output_reserve: int, max_tokens: int) -> int:
+    """Largest chunk every model can take next to the prompt and its answer, capped at max_tokens."""
+    window = min((context_window(m) for m in models), default=DEFAULT_CONTEXT_WINDOW)
+    return max(256, min(max_tokens, window - prompt_overhead - output_reserve))
+
+
+# -----------------------------
+# Token-aware chunker
+# -----------------------------
+def _blocks(text: str) -> list[str]:
+    """Paragraphs (blank-line separated); a heading always starts a new block."""
+    blocks = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        current = []
+        for line in paragraph.splitlines():
+            if HEADING_RE.match(line) and current:
+                blocks.append("\n".join(current))
+                current = []
+            current.append(line)
+        if current:
+            blocks.append("\n".join(current))
+    return [b.strip() for b in blocks if b.strip()]
+
+
+def _split_oversized(block: str, max_tokens: int, model: str | None, level: int = 0) -> list[str]:
+    """Split a block that alone exceeds max_tokens: by line, then by sentence, then by raw tokens."""
+    if level == 0:
+        parts, joiner = block.splitlines(), "\n"
+    elif level == 1:
+        parts, joiner = SENTENCE_RE.split(block), " "
+    else:
+        return _split_by_tokens(block, max_tokens, model)
+
+    pieces, current, current_tokens = [], [], 0
+    for part in parts:
+        tokens = count_tokens(part, model)
+        if tokens > max_tokens:
+            if current:
+                pieces.append(joiner.join(current))
+                current, current_tokens = [], 0
+            pieces.extend(_split_oversized(part, max_tokens, model, level + 1))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            pieces.append(joiner.join(current))
+            current, current_tokens = [], 0
+        current.append(part)
+        current_tokens += tokens
+    if current:
+        pieces.append(joiner.join(current))
+    return pieces
+
+
+def _split_by_tokens(text: str, max_tokens: int, model: str | None) -> list[str]:
+    encoding = get_encoding(model)
+    if encoding is None:
+        step = max_tokens * 4
+        return [text[i:i + step] for i in range(0, len(text), step)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+
+def _tail(text: str, overlap_tokens: int, model: str | None) -> str:
+    """Trailing sentences of text that fit in overlap_tokens (context for the next chunk)."""
+    if overlap_tokens <= 0:
+        return ""
+    tail, used = [], 0
+    for sentence in reversed(SENTENCE_RE.split(text)):
+        tokens = count_tokens(sentence, model)
+        if used + tokens > overlap_tokens:
+            break
+        tail.insert(0, sentence)
+        used += tokens
+    return " ".join(tail)
+
+
+def chunk_text_by_tokens(text: str, max_tokens: int, overlap_tokens: int = 0, model: str | None = None) -> list[str]:
+    """
+    Pack paragraphs into chunks of at most max_tokens (plus overlap).
+    - Chunks break at paragraph boundaries, and before a heading once half full.
+    - Paragraphs larger than a chunk are split by line, then by sentence.
+    - Each chunk after the first starts with the last overlap_tokens of the previous one.
+    """
+    if not text or not text.strip():
+        return []
+
+    chunks: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+
+    for block in _blocks(text):
+        tokens = count_tokens(block, model)
+        if tokens > max_tokens:
+            flush()
+            chunks.extend(_split_oversized(block, max_tokens, model))
+            continue
+        starts_section = bool(HEADING_RE.match(block))
+        if current and (
+            current_tokens + tokens > max_tokens
+            or (starts_section and current_tokens >= max_tokens // 2)
+        ):
+            flush()
+        current.append(block)
+        current_tokens += tokens
+    flush()
+
+    if overlap_tokens <= 0 or len(chunks) < 2:
+        return chunks
+    with_overlap = [chunks[0]]
+    for previous, chunk in zip(chunks, chunks[1:]):
+        tail = _tail(previous, overlap_tokens, model)
+        with_overlap.append(f"{tail}\n\n{chunk}" if tail else chunk)
+    return with_overlap
@@ -0,0 +1,95 @@
+# backend/utils/dedup.py
+import hashlib
+import re
+
+# One-permutation MinHash: each shingle hash lands in one of NUM_BINS bins (low bits)
+# and every bin keeps its minimum (high bits). LSH-banded into BANDS x ROWS.
+NUM_BINS = 64
+BANDS = 16
+ROWS = NUM_BINS // BANDS
+SHINGLE_WORDS = 5
+
+_BIN_BITS = NUM_BINS.bit_length() - 1
+_EMPTY = 1 << 64
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set[int]:
+    """Hashed word n-grams of the normalized text (the whole text if it's shorter)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return {int.from_bytes(hashlib.blake2b(g.encode(), digest_size=8).digest(), "big") for g in grams}
+
+
+def minhash(shingle_set: set[int]) -> tuple[int, ...]:
+    """Signature in a single pass over the shingles."""
+    signature = [_EMPTY] * NUM_BINS
+    for x in shingle_set:
+        bin_index = x & (NUM_BINS - 1)
+        value = x >> _BIN_BITS
+        if value < signature[bin_index]:
+            signature[bin_index] = value
+    return tuple(signature)
+
+
+def similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures (bins empty in both don't count)."""
+    filled = equal = 0
+    for x, y in zip(sig_a, sig_b):
+        if x == _EMPTY and y == _EMPTY:
+            continue
+        filled += 1
+        equal += x == y
+    return equal / filled if filled else 1.0
+
+
+def dedup_chunks(chunks: list[str], threshold: float) -> tuple[list[str], dict]:
+    """
+    Drop chunks that are near-duplicates (estimated Jaccard >= threshold) of an
+    earlier kept chunk. Candidates come from LSH buckets, so this stays close to
+    linear in the number of chunks. Order of the kept chunks is preserved.
+    Returns (kept_chunks, {"total", "kept", "dropped", "duplicates": {dropped_index: kept_index}}).
+    """
+    buckets: dict[tuple[int, bytes], list[int]] = {}
+    signatures: dict[int, tuple[int, ...]] = {}
+    kept: list[str] = []
+    duplicates: dict[int, int] = {}
+
+    for index, chunk in enumerate(chunks):
+        signature = minhash(shingles(chunk))
+        bands = [
+            (band, hashlib.blake2b(repr(signature[band * ROWS:(band + 1) * ROWS]).encode(), digest_size=8).digest())
+            for band in range(BANDS)
+        ]
+
+        match = None
+        seen = set()
+        for key in bands:
+            for candidate in buckets.get(key, ()):
+                if candidate not in seen:
+                    seen.add(candidate)
+                    if similarity(signature, signatures[candidate]) >= threshold:
+                        match = candidate
+                        break
+            if match is not None:
+                break
+
+        if match is not None:
+            duplicates[index] = match
+            continue
+
+        signatures[index] = signature
+        kept.append(chunk)
+        for key in bands:
+            buckets.setdefault(key, []).append(index)
+
+    report = {
+        "total": len(chunks),
+        "kept": len(kept),
+        "dropped": len(duplicates),
+        "duplicates": duplicates,
+    }
+    return kept, report
@@ -3,3 +3,24 @@ from fastapi import HTTPException
 class URLValidationError(HTTPException):
     def __init__(self, detail: str = "URL validation failed"):
         super().__init__(status_code=400, detail=detail)
+
+class ExtractionTimeoutError(HTTPException):
+    def __init__(self, detail: str = "Text extraction timed out"):
+        super().__init__(status_code=504, detail=detail)
+
+class UnsupportedContentError(HTTPException):
+    def __init__(self, detail: str = "Unsupported content type"):
+        super().__init__(status_code=415, detail=detail)
+
+class ServerBusyError(HTTPException):
+    """503 + Retry-After for every "come back later" rejection."""
+    def __init__(self, detail: str = "Server is busy, please retry later", retry_after: int = 30):
+        super().__init__(status_code=503, detail=detail, headers={"Retry-After": str(retry_after)})
+
+class JobQueueFullError(ServerBusyError):
+    def __init__(self, detail: str = "Too many queued jobs, please retry later", retry_after: int = 30):
+        super().__init__(detail=detail, retry_after=retry_after)
+
+class UploadTooLargeError(HTTPException):
+    def __init__(self, max_bytes: int):
+        super().__init__(status_code=413, detail=f"File is larger than the {max_bytes / (1024 * 1024):g}MB limit")
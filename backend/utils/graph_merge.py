@@ -0,0 +1,151 @@
+# backend/utils/graph_merge.py
+import uuid
+
+
+class MindmapMerger:
+    """
+    Incrementally merge chunk mindmaps into one graph.
+    - Deduplicate root nodes by label (case-insensitive).
+    - Deduplicate sub/detail nodes by (parent_id + label).
+    - Ensure all edges point to the correct merged nodes.
+
+    Parent lookup and edge dedup use indexes built once per mindmap,
+    so merging is linear in the total number of nodes and edges.
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self.edges = []
+
+        # Track unique nodes
+        self.root_map = {}      # label_lower -> root_id
+        self.child_map = {}     # (parent_id, label_lower) -> node_id
+        self.id_remap = {}      # old_id -> new_id
+        self.edge_pairs = set() # (source, target) already merged
+
+    def add(self, mindmap: dict) -> dict:
+        """
+        Merge one mindmap and return the delta it produced:
+        {"nodes": added nodes, "edges": added edges, "remap": {old_id: merged_id}}
+        """
+        edges = mindmap.get("edges", [])
+        added_nodes = []
+        added_edges = []
+        remap = {}
+
+        # ✅ target -> source index (first edge wins, like a linear scan would)
+        parent_of = {}
+        for e in edges:
+            parent_of.setdefault(e["target"], e["source"])
+
+        for node in mindmap.get("nodes", []):
+            old_id = node["id"]
+            node_label = node["data"]["label"].strip().lower()
+
+            # ✅ Root deduplication
+            if node["type"] == "root":
+                if node_label in self.root_map:
+                    self.id_remap[old_id] = remap[old_id] = self.root_map[node_label]
+                else:
+                    self.root_map[node_label] = old_id
+                    added_nodes.append(node)
+                continue
+
+            # ✅ For sub/detail nodes, dedupe under the same parent
+            parent_id = parent_of.get(old_id)
+            key = (parent_id, node_label)
+            if parent_id and key in self.child_map:
+                # Map old_id to existing deduped node
+                self.id_remap[old_id] = remap[old_id] = self.child_map[key]
+            else:
+                self.child_map[key] = old_id
+                added_nodes.append(node)
+
+        # ✅ Process edges
+        for edge in edges:
+            edge = edge.copy()
+            if edge["source"] in self.id_remap:
+                edge["source"] = self.id_remap[edge["source"]]
+            if edge["target"] in self.id_remap:
+                edge["target"] = self.id_remap[edge["target"]]
+
+            # avoid duplicate edges
+            pair = (edge["source"], edge["target"])
+            if pair not in self.edge_pairs:
+                self.edge_pairs.add(pair)
+                added_edges.append(edge)
+
+        self.nodes.extend(added_nodes)
+        self.edges.extend(added_edges)
+        return {"nodes": added_nodes, "edges": added_edges, "remap": remap}
+
+    def graph(self) -> dict:
+        return {"nodes": list(self.nodes), "edges": list(self.edges)}
+
+
+class OrderedMerger:
+    """
+    Merge chunk mindmaps that may finish out of order, strictly in chunk order,
+    so the incremental deltas add up to exactly what merge_mindmaps returns.
+    """
+
+    def __init__(self):
+        self.merger = MindmapMerger()
+        self.pending = {}       # chunk_index -> mindmap waiting for earlier chunks
+        self.next_index = 0
+
+    def add(self, index: int, mindmap: dict) -> list[tuple[int, dict]]:
+        """Queue a chunk; return the (chunk_index, delta) pairs that could be merged now."""
+        self.pending[index] = mindmap
+        deltas = []
+        while self.next_index in self.pending:
+            deltas.append((self.next_index, self.merger.add(self.pending.pop(self.next_index))))
+            self.next_index += 1
+        return deltas
+
+    def graph(self) -> dict:
+        return self.merger.graph()
+
+    def resolve(self, node_id: str) -> str:
+        """Merged id of a chunk node (it may have been deduplicated into another)."""
+        return self.merger.id_remap.get(node_id, node_id)
+
+
+def merge_mindmaps(mindmaps: list[dict]) -> dict:
+    """Merge multiple mindmaps (from different chunks) into one."""
+    merger = MindmapMerger()
+    for mm in mindmaps:
+        merger.add(mm)
+    return merger.graph()
+
+
+def reconcile_roots(graph: dict, main_id: str | None = None) -> dict:
+    """
+    Reduce step for independently processed chunks.
+    - Keep main_id (default: the first root) as the main idea.
+    - Demote every other root to "sub" and attach it to the main root.
+    - Demoted roots' "sub" children become "detail" to keep depth rules intact.
+    """
+    roots = [n for n in graph["nodes"] if n["type"] == "root"]
+    if len(roots) <= 1:
+        return graph
+
+    if main_id is None or all(n["id"] != main_id for n in roots):
+        main_id = roots[0]["id"]
+    roots = [n for n in roots if n["id"] != main_id]
+    demoted = {n["id"] for n in roots}
+    demoted_children = {e["target"] for e in graph["edges"] if e["source"] in demoted}
+
+    nodes = []
+    for node in graph["nodes"]:
+        if node["id"] in demoted:
+            node = {**node, "type": "sub"}
+        elif node["id"] in demoted_children and node["type"] == "sub":
+            node = {**node, "type": "detail"}
+        nodes.append(node)
+
+    edges = list(graph["edges"])
+    for root in roots:
+        edges.append({"id": f"edge_{uuid.uuid4().hex[:8]}", "source": main_id, "target": root["id"]})
+
+    return {"nodes": nodes, "edges": edges}
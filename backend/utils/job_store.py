@@ -0,0 +1,130 @@
+# backend/utils/job_store.py
+import os
+import json
+import time
+import sqlite3
+import threading
+
+
+class JobStore:
+    """
+    SQLite store for background jobs and their event logs.
+    Events are numbered per job (seq 0, 1, 2...) and double as SSE ids,
+    so clients can resume from Last-Event-ID after reconnecting.
+    """
+
+    def __init__(self, db_path: str):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS job_events (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    event TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                );
+            """)
+            self._db.commit()
+
+    def create_job(self, job_id: str, kind: str, source: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, source, status, created, updated) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, source, now, now),
+            )
+            self._db.commit()
+
+    def set_status(self, job_id: str, status: str, error: str | None = None):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?",
+                (status, error, time.time(), job_id),
+            )
+            self._db.commit()
+
+    def get_job(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def append_event(self, job_id: str, seq: int, event: str, payload):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO job_events (job_id, seq, event, payload) VALUES (?, ?, ?, ?)",
+                (job_id, seq, event, json.dumps(payload)),
+            )
+            self._db.commit()
+
+    def append_events(self, job_id: str, events: list[tuple[int, str, object]]):
+        """
+        Insert (seq, event, payload) rows in one transaction. Rows already stored
+        are skipped: a flush cancelled after its thread committed is retried as a whole.
+        """
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO job_events (job_id, seq, event, payload) VALUES (?, ?, ?, ?)",
+                [(job_id, seq, event, json.dumps(payload)) for seq, event, payload in events],
+            )
+            self._db.commit()
+
+    def events_after(self, job_id: str, last_seq: int = -1) -> list[tuple[int, str, object]]:
+        """Events with seq > last_seq, in order."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, event, payload FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, last_seq),
+            ).fetchall()
+        return [(row["seq"], row["event"], json.loads(row["payload"])) for row in rows]
+
+    def last_event(self, job_id: str, event: str):
+        """Payload of the latest event of the given type, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload FROM job_events WHERE job_id = ? AND event = ? ORDER BY seq DESC LIMIT 1",
+                (job_id, event),
+            ).fetchone()
+        return json.loads(row["payload"]) if row else None
+
+    def mark_interrupted(self) -> int:
+        """Fail jobs left queued/running by a previous process (their tasks are gone)."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted by server restart', updated = ? "
+                "WHERE status IN ('queued', 'running')",
+                (time.time(),),
+            )
+            self._db.commit()
+            return cursor.rowcount
+
+    def prune(self, older_than_secs: float) -> int:
+        """Delete finished jobs (and their events) older than the given age."""
+        cutoff = time.time() - older_than_secs
+        with self._lock:
+            ids = [row["id"] for row in self._db.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND updated < ?", (cutoff,)
+            ).fetchall()]
+            self._db.executemany("DELETE FROM job_events WHERE job_id = ?", [(i,) for i in ids])
+            self._db.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in ids])
+            self._db.commit()
+        return len(ids)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,93 @@
+# backend/utils/json_stream.py
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MindmapJSONStream:
+    """
+    Incremental parser for streamed mindmap JSON.
+
+    Feed it text as tokens arrive; it returns every object of the top-level
+    "nodes" / "edges" arrays as soon as its closing brace is seen, e.g.
+    [("node", {...}), ("edge", {...})]. Text before the first "{" (markdown
+    fences, chatter) is ignored.
+    """
+
+    ARRAY_KINDS = {"nodes": "node", "edges": "edge"}
+
+    def __init__(self):
+        self.text = ""
+        self.pos = 0
+        self.started = False
+        self.finished = False
+
+        self._stack = []            # "{" or ("[", key) per open container
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+        self._pending_key = None
+        self._capture_start = None
+        self._capture_kind = None
+
+    def feed(self, piece: str) -> list[tuple[str, dict]]:
+        self.text += piece
+        found = []
+        text = self.text
+
+        for i in range(self.pos, len(text)):
+            if self.finished:
+                break
+            c = text[i]
+
+            if not self.started:
+                if c == "{":
+                    self.started = True
+                    self._stack.append("{")
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1:i]
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":":
+                if self._stack and self._stack[-1] == "{":
+                    self._pending_key = self._last_string
+            elif c == "[":
+                key = self._pending_key if self._stack and self._stack[-1] == "{" else None
+                self._stack.append(("[", key))
+                self._pending_key = None
+            elif c == "{":
+                if self._capture_start is None and len(self._stack) == 2:
+                    kind = self.ARRAY_KINDS.get(self._stack[1][1]) if isinstance(self._stack[1], tuple) else None
+                    if kind:
+                        self._capture_start = i
+                        self._capture_kind = kind
+                self._stack.append("{")
+                self._pending_key = None
+            elif c in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if c == "}" and self._capture_start is not None and len(self._stack) == 2:
+                    raw = text[self._capture_start:i + 1]
+                    try:
+                        found.append((self._capture_kind, json.loads(raw)))
+                    except ValueError as e:
+                        logger.warning("Skipping malformed streamed %s: %s", self._capture_kind, e)
+                    self._capture_start = None
+                if not self._stack:
+                    self.finished = True
+
+        self.pos = len(text)
+        return found
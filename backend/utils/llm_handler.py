@@ -2,10 +2,15 @@
 
 import asyncio
 import logging
+import time
 from typing import Any, Callable, Dict, Optional
 
 from langchain_core.exceptions import OutputParserException
 
+from utils.cancellation import CancelToken, PipelineCancelledError
+from utils.llm_scheduler import backoff_delay, estimate_tokens, is_rate_limit_error, llm_scheduler
+from utils.metrics import LLM_CALL_SECONDS, LLM_RETRIES, LLM_TOKENS, current_run
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,44 +22,84 @@ async def safe_invoke(
     llm_func: Callable[..., Any],
     *args,
     retries: int = 3,
-    backoff: float = 2.0,
+    backoff: Optional[float] = None,
+    cancel_token: Optional[CancelToken] = None,
+    llm_key: Optional[str] = "default",
+    est_tokens: Optional[int] = None,
+    kind: str = "llm",
     **kwargs
 ) -> Optional[Dict]:
     """
     Safely invoke an LLM function with retry & error handling.
+    Every attempt goes through the shared scheduler for llm_key, which enforces
+    the provider's RPM/TPM budget and adapts concurrency to 429s and latency.
 
     Args:
         llm_func: The LLM function (usually `chain.ainvoke`).
         *args: Positional args for the function.
         retries: Number of retries before failing.
-        backoff: Delay (in seconds) between retries.
+        backoff: Base delay (in seconds) of the jittered exponential backoff
+            between retries (defaults to LLM_BACKOFF_BASE_SECS).
+        cancel_token: If given, the call (and any retry wait) is cancelled
+            as soon as the token is, raising PipelineCancelledError.
+        llm_key: Provider/model the call goes to (services.llm.scheduler_key);
+            None skips the scheduler for callers that schedule themselves.
+        est_tokens: Token estimate for the TPM budget (defaults to one
+            derived from the call's arguments).
+        kind: What the call is for ("graph", "summary", "title", ...); labels
+            its latency, retry and token metrics.
         **kwargs: Keyword args for the function.
 
     Returns:
         Response from the LLM or None if it fails.
     """
 
+    scheduler = llm_scheduler.get(llm_key) if llm_key is not None else None
+    if est_tokens is None:
+        est_tokens = estimate_tokens(*args, kwargs or None)
+
+    async def scheduled_call():
+        if scheduler is None:
+            return await llm_func(*args, **kwargs)
+        async with scheduler.slot(est_tokens) as ticket:
+            response = await llm_func(*args, **kwargs)
+            ticket.settle(response)
+            return response
+
     for attempt in range(1, retries + 1):
+        started = time.perf_counter()
         try:
-            return await llm_func(*args, **kwargs)
+            if cancel_token is not None:
+                # Also abandons the wait for a scheduler slot
+                response = await cancel_token.run(scheduled_call())
+            else:
+                response = await scheduled_call()
+            _record_call(kind, "ok", started, response, est_tokens)
+            return response
+
+        except PipelineCancelledError:
+            _record_call(kind, "cancelled", started)
+            raise
 
         except Exception as e:
-            err_msg = str(e).lower()
-
-            # Handle token expiration
-            if "401" in err_msg or "unauthorized" in err_msg or "token" in err_msg:
-                logger.error("❌ Token expired or invalid: %s", e)
-                raise LLMTokenExpiredError("LLM token expired or invalid")
-
-            # Handle rate limiting
-            if "429" in err_msg or "rate limit" in err_msg:
+            _record_call(kind, "rate_limited" if is_rate_limit_error(e) else "error", started)
+            # Handle rate limiting (before the auth check: 429 messages often mention "tokens")
+            if is_rate_limit_error(e):
+                delay = backoff_delay(attempt, backoff)
                 logger.warning(
                     "⚠️ Rate limit hit (attempt %d/%d). Retrying in %.1f sec...",
-                    attempt, retries, backoff
+                    attempt, retries, delay
                 )
-                await asyncio.sleep(backoff)
+                if attempt < retries:
+                    LLM_RETRIES.inc(kind=kind, reason="rate_limit")
+                await _sleep(delay, cancel_token)
                 continue
 
+            # Handle token expiration
+            if _is_auth_error(e):
+                logger.error("❌ Token expired or invalid: %s", e)
+                raise LLMTokenExpiredError("LLM token expired or invalid")
+
             # Handle output parsing errors
             if isinstance(e, OutputParserException):
                 logger.error("❌ Parsing error: %s", e)
@@ -64,7 +109,51 @@ async def safe_invoke(
             logger.error(
                 "❌ Unexpected LLM error on attempt %d/%d: %s", attempt, retries, e
             )
-            await asyncio.sleep(backoff)
+            if attempt < retries:
+                LLM_RETRIES.inc(kind=kind, reason="error")
+            await _sleep(backoff_delay(attempt, backoff), cancel_token)
 
     logger.error("❌ Failed after %d retries", retries)
     return None
+
+
+_AUTH_MARKERS = (
+    "401", "unauthorized", "invalid api key", "invalid_api_key", "api key not valid",
+    # Not a bare "expired": "deadline expired" / "lease expired" are transient and retried
+    "api key expired", "token expired", "credentials expired",
+)
+
+
+def _is_auth_error(e: Exception) -> bool:
+    """Rejected credentials (not any message that mentions tokens, like TPM quota errors)."""
+    if getattr(e, "status_code", None) == 401:
+        return True
+    err_msg = str(e).lower()
+    return any(marker in err_msg for marker in _AUTH_MARKERS)
+
+
+def _record_call(kind: str, outcome: str, started: float, response=None, est_tokens: int = 0):
+    """Latency/token metrics of one attempt, also added to the current run's timing summary."""
+    elapsed = time.perf_counter() - started
+    LLM_CALL_SECONDS.observe(elapsed, kind=kind, outcome=outcome)
+    run = current_run()
+    if run is not None:
+        run.add_llm(kind, elapsed)
+    if outcome != "ok":
+        return
+
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict) and usage.get("total_tokens"):
+        LLM_TOKENS.inc(usage.get("input_tokens", 0), kind=kind, type="input")
+        LLM_TOKENS.inc(usage.get("output_tokens", 0), kind=kind, type="output")
+    elif est_tokens:
+        # Streamed calls don't surface usage; count the scheduler's estimate instead
+        LLM_TOKENS.inc(est_tokens, kind=kind, type="estimated")
+
+
+async def _sleep(delay: float, cancel_token: Optional[CancelToken]):
+    """Retry wait that ends early (with PipelineCancelledError) on cancellation."""
+    if cancel_token is not None:
+        await cancel_token.run(asyncio.sleep(delay))
+    else:
+        await asyncio.sleep(delay)
@@ -0,0 +1,231 @@
+# backend/utils/llm_scheduler.py
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+
+from core.config import settings
+from utils.cancellation import PipelineCancelledError
+
+
+def estimate_tokens(*values) -> int:
+    """Rough token count of prompt inputs (~4 chars per token)."""
+    chars = 0
+    for value in values:
+        if isinstance(value, dict):
+            chars += sum(len(str(v)) for v in value.values())
+        elif value is not None:
+            chars += len(str(value))
+    return chars // 4 + 1
+
+
+def backoff_delay(attempt: int, base: float | None = None, cap: float | None = None) -> float:
+    """Exponential backoff with full jitter, so throttled callers don't retry in lockstep."""
+    base = settings.LLM_BACKOFF_BASE_SECS if base is None else base
+    cap = settings.LLM_BACKOFF_MAX_SECS if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "resource_exhausted" in message
+
+
+class TokenBucket:
+    """
+    Per-minute budget that refills continuously. acquire() waits (FIFO) until
+    the amount is available; settle() corrects an estimate once the real usage
+    is known and may leave the bucket in debt.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def settle(self, delta: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit: +1/limit per healthy call (about +1 per round trip),
+    halved on a 429, and trimmed when latency exceeds the target.
+    Decreases are spaced by a cooldown so one burst of 429s counts once.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, latency_target: float, cooldown: float):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency: float | None, throttled: bool):
+        async with self._cond:
+            self.in_flight -= 1
+            self._adjust(latency, throttled)
+            self._cond.notify_all()
+
+    def _adjust(self, latency: float | None, throttled: bool):
+        now = time.monotonic()
+        if throttled or (latency is not None and latency > self.latency_target):
+            if now - self._last_decrease >= self.cooldown:
+                factor = settings.LLM_AIMD_DECREASE if throttled else 0.9
+                self.limit = max(float(self.minimum), self.limit * factor)
+                self._last_decrease = now
+        elif latency is not None:
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+
+
+class Ticket:
+    """Handed out by ProviderScheduler.slot(); report the real token usage through it."""
+
+    def __init__(self, scheduler: "ProviderScheduler", est_tokens: int):
+        self._scheduler = scheduler
+        self.est_tokens = est_tokens
+
+    def settle(self, response):
+        usage = getattr(response, "usage_metadata", None) or {}
+        total = usage.get("total_tokens") if isinstance(usage, dict) else None
+        if total and self._scheduler.tpm is not None:
+            self._scheduler.tpm.settle(total - self.est_tokens)
+
+
+class ProviderScheduler:
+    """Rate budget + adaptive concurrency + wait metrics for one provider/model."""
+
+    def __init__(self, key: str, rpm: int | None, tpm: int | None):
+        self.key = key
+        self.rpm = TokenBucket(rpm) if rpm else None
+        self.tpm = TokenBucket(tpm) if tpm else None
+        self.limiter = AdaptiveLimiter(
+            initial=settings.LLM_INITIAL_CONCURRENCY,
+            minimum=settings.LLM_MIN_CONCURRENCY,
+            maximum=settings.LLM_MAX_CONCURRENCY,
+            latency_target=settings.LLM_LATENCY_TARGET_SECS,
+            cooldown=settings.LLM_AIMD_COOLDOWN_SECS,
+        )
+        self.queued = 0
+        self.requests = 0
+        self.throttled = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @asynccontextmanager
+    async def slot(self, est_tokens: int = 0):
+        """Wait for a concurrency slot and rate budget, then time the call made inside."""
+        queued_at = time.monotonic()
+        self.queued += 1
+        try:
+            await self.limiter.acquire()
+        finally:
+            self.queued -= 1
+
+        started = None
+        outcome = "ok"
+        try:
+            if self.rpm is not None:
+                await self.rpm.acquire(1)
+            if self.tpm is not None and est_tokens:
+                await self.tpm.acquire(est_tokens)
+
+            started = time.monotonic()
+            waited = started - queued_at
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.requests += 1
+            yield Ticket(self, est_tokens)
+        except (asyncio.CancelledError, PipelineCancelledError):
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            outcome = "throttled" if is_rate_limit_error(e) else "failed"
+            if started is not None:
+                if outcome == "throttled":
+                    self.throttled += 1
+                else:
+                    self.failed += 1
+            raise
+        finally:
+            # Successful calls feed the latency signal, 429s the decrease; anything else neither
+            latency = time.monotonic() - started if started is not None and outcome == "ok" else None
+            await self.limiter.release(latency, outcome == "throttled" and started is not None)
+
+    def stats(self) -> dict:
+        return {
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "queued": self.queued,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "failed": self.failed,
+            "avg_wait_secs": round(self.wait_total / self.requests, 3) if self.requests else 0.0,
+            "max_wait_secs": round(self.wait_max, 3),
+        }
+
+
+def _bare_key(key: str) -> str:
+    """Drop a path prefix from the model part: "Class:models/name" -> "Class:name" (as describe_llm does)."""
+    provider, sep, model = key.partition(":")
+    return provider + sep + model.rsplit("/", 1)[-1] if sep else key
+
+
+class LLMScheduler:
+    """
+    One ProviderScheduler per provider/model key (see services.llm.describe_llm).
+    Budgets come from LLM_RATE_LIMITS (longest matching key prefix), else LLM_RPM / LLM_TPM.
+    """
+
+    def __init__(self):
+        self._schedulers: dict[str, ProviderScheduler] = {}
+
+    def get(self, key: str) -> ProviderScheduler:
+        scheduler = self._schedulers.get(key)
+        if scheduler is None:
+            rpm, tpm = self._limits_for(key)
+            scheduler = self._schedulers[key] = ProviderScheduler(key, rpm, tpm)
+        return scheduler
+
+    @staticmethod
+    def _limits_for(key: str) -> tuple[int | None, int | None]:
+        # Configured keys may spell the model as "models/gemini-2.0-flash"; scheduler keys never do
+        limits = {_bare_key(prefix): value for prefix, value in settings.LLM_RATE_LIMITS.items()}
+        matches = [prefix for prefix in limits if _bare_key(key).startswith(prefix)]
+        if matches:
+            chosen = limits[max(matches, key=len)]
+            return chosen.get("rpm"), chosen.get("tpm")
+        return settings.LLM_RPM, settings.LLM_TPM
+
+    def stats(self) -> dict:
+        return {key: scheduler.stats() for key, scheduler in self._schedulers.items()}
+
+
+llm_scheduler = LLMScheduler()
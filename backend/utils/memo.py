@@ -0,0 +1,115 @@
+# backend/utils/memo.py
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+
+from core.config import settings
+from utils.cache import Cache
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(text: str, length: int = 12) -> str:
+    """Short hash used as a version tag for prompts."""
+    return hashlib.sha256(text.encode()).hexdigest()[:length]
+
+
+class ChunkMemo:
+    """
+    Content-addressed memo for per-chunk LLM outputs.
+    Keys are hash(kind + prompt version + model + input text), so unchanged
+    chunks of a re-uploaded document skip the LLM entirely.
+    Entries live in an in-memory LRU and, optionally, in a SQLite file.
+    """
+
+    PRUNE_EVERY = 200  # writes between disk prunes
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: int = 7 * 24 * 3600,
+        db_path: str | None = None,
+        disk_max_entries: int = 50000,
+    ):
+        self.memory = Cache(
+            ttl_seconds=ttl_seconds, max_entries=max_entries, max_bytes=max_bytes, store_text=True
+        )
+        self.ttl = ttl_seconds
+        self.disk_max_entries = disk_max_entries
+        self.disk_hits = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db = self._open_db(db_path) if db_path else None
+
+    @staticmethod
+    def make_key(kind: str, text: str, prompt_version: str, model: str) -> str:
+        return hashlib.sha256("\x1f".join([kind, prompt_version, model, text]).encode()).hexdigest()
+
+    def _open_db(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        db = sqlite3.connect(db_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        db.commit()
+        return db
+
+    def get(self, key: str):
+        """Return the memoized value or None."""
+        value = self.memory.get_cache(key)
+        if value is not None or self._db is None:
+            return value
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created FROM memo WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] + self.ttl <= time.time():
+            return None
+
+        self.disk_hits += 1
+        value = json.loads(row[0])
+        self.memory.set_cache(key, value)
+        return value
+
+    def set(self, key: str, value):
+        self.memory.set_cache(key, value)
+        if self._db is None:
+            return
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO memo (key, value, created) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune()
+            self._db.commit()
+
+    def _prune(self):
+        """Drop expired rows, then the oldest rows beyond disk_max_entries."""
+        self._db.execute("DELETE FROM memo WHERE created <= ?", (time.time() - self.ttl,))
+        self._db.execute(
+            "DELETE FROM memo WHERE key IN ("
+            " SELECT key FROM memo ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_entries,),
+        )
+
+    def stats(self) -> dict:
+        return {**self.memory.stats(), "disk_hits": self.disk_hits, "persistent": self._db is not None}
+
+
+chunk_memo = ChunkMemo(
+    max_entries=settings.MEMO_MAX_ENTRIES,
+    max_bytes=settings.MEMO_MAX_BYTES,
+    ttl_seconds=settings.MEMO_TTL_SECS,
+    db_path=settings.MEMO_DB_PATH,
+    disk_max_entries=settings.MEMO_DISK_MAX_ENTRIES,
+)
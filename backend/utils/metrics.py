@@ -0,0 +1,259 @@
+# backend/utils/metrics.py
+"""
+In-process metrics in the Prometheus text exposition format (GET /api/metrics).
+
+- counters / gauges / histograms with labels, created once at import time:
+      LLM_SECONDS = metrics.histogram("cognet_llm_call_seconds", "...", ["kind"])
+      LLM_SECONDS.observe(1.2, kind="summary")
+- collectors turn the stats() dicts of caches, pools and schedulers into gauges at scrape time
+- stage(name) times a pipeline stage into PIPELINE_STAGE_SECONDS and, when a
+  run is being tracked (track_run), into that run's timing summary
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+# Seconds: LLM calls take 1-60s, extraction and merge much less
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, label_names: list[str] | tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def _lines(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._lines()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _lines(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: list[str] | tuple = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _lines(self) -> list[str]:
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts + [count]):
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {bucket_count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus scrape-time collectors, rendered together by render()."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[tuple[str, Callable[[], dict], str | None]] = []
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        elif type(metric) is not cls:
+            raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name: str, help_text: str, label_names=()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, label_names)
+
+    def gauge(self, name: str, help_text: str, label_names=()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, label_names)
+
+    def histogram(self, name: str, help_text: str, label_names=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, label_names, buckets=buckets)
+
+    def register_stats(self, prefix: str, stats: Callable[[], dict], label: str | None = None):
+        """
+        Export the numeric values of stats() as gauges named prefix_<key>.
+        With label, stats() returns {label_value: {key: value}} (e.g. one entry per provider).
+        """
+        self._collectors = [c for c in self._collectors if c[0] != prefix]
+        self._collectors.append((prefix, stats, label))
+
+    def _collect(self, prefix: str, stats: Callable[[], dict], label: str | None) -> list[str]:
+        rows = stats().items() if label else [(None, stats())]
+        series: dict[str, list[str]] = {}
+        for label_value, values in rows:
+            labels = _labels((label,), (label_value,)) if label else ""
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)) or value != value:  # skip text, None and NaN
+                    continue
+                series.setdefault(f"{prefix}_{key}", []).append(f"{prefix}_{key}{labels} {_number(value)}")
+        lines = []
+        for name, samples in series.items():
+            lines += [f"# TYPE {name} gauge", *samples]
+        return lines
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        for prefix, stats, label in self._collectors:
+            lines += self._collect(prefix, stats, label)
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+PIPELINE_STAGE_SECONDS = metrics.histogram(
+    "cognet_pipeline_stage_seconds", "Wall time of each mindmap pipeline stage", ["stage"]
+)
+PIPELINE_RUNS = metrics.counter(
+    "cognet_pipeline_runs_total", "Pipeline runs by source and outcome", ["source", "outcome"]
+)
+PIPELINE_SECONDS = metrics.histogram(
+    "cognet_pipeline_seconds", "Wall time of whole pipeline runs", ["source"]
+)
+PIPELINES_IN_FLIGHT = metrics.gauge(
+    "cognet_pipelines_in_flight", "Pipeline runs currently executing", ["source"]
+)
+LLM_CALL_SECONDS = metrics.histogram(
+    "cognet_llm_call_seconds", "Latency of single LLM call attempts (including scheduler wait)", ["kind", "outcome"]
+)
+LLM_RETRIES = metrics.counter(
+    "cognet_llm_retries_total", "LLM call attempts that were retried", ["kind", "reason"]
+)
+LLM_TOKENS = metrics.counter(
+    "cognet_llm_tokens_total", "LLM tokens reported by the provider (or estimated when it reports none)", ["kind", "type"]
+)
+
+
+# -----------------------------
+# Per-run timing summaries
+# -----------------------------
+class RunTimings:
+    """Stage and LLM time of one pipeline run, attached to its result when enabled."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.llm: dict[str, dict] = {}
+
+    def add_stage(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_llm(self, kind: str, seconds: float):
+        entry = self.llm.setdefault(kind, {"calls": 0, "seconds": 0.0})
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+
+    def summary(self) -> dict:
+        return {
+            "total_secs": round(time.perf_counter() - self.started, 3),
+            "stages": {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            # LLM calls overlap in parallel mode, so their seconds can exceed the stage time
+            "llm": {kind: {"calls": e["calls"], "secs": round(e["seconds"], 3)} for kind, e in self.llm.items()},
+        }
+
+
+_current_run: contextvars.ContextVar[RunTimings | None] = contextvars.ContextVar("current_run", default=None)
+
+
+def track_run() -> RunTimings:
+    """Start a timing summary for the current task (and the tasks it spawns from now on)."""
+    timings = RunTimings()
+    _current_run.set(timings)
+    return timings
+
+
+def current_run() -> RunTimings | None:
+    return _current_run.get()
+
+
+@contextmanager
+def stage(name: str):
+    """Time a pipeline stage into PIPELINE_STAGE_SECONDS and the current run's summary."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        PIPELINE_STAGE_SECONDS.observe(elapsed, stage=name)
+        run = _current_run.get()
+        if run is not None:
+            run.add_stage(name, elapsed)
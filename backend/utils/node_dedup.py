@@ -0,0 +1,204 @@
+# backend/utils/node_dedup.py
+import logging
+import re
+import zlib
+
+from core.config import settings
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pass is skipped without numpy
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DIM = 1024              # hashed feature columns
+NGRAM_SIZES = (3, 4)    # character n-grams of the label
+CONTENT_WEIGHT = 0.35   # content words count less than the label
+BLOCK_SHINGLES = 4      # rarest label 4-grams per node used to find candidate pairs
+MAX_POSTING = 256       # label 4-grams shared by more nodes than this don't propose candidates
+
+_WORD_RE = re.compile(r"\w+")
+_PAREN_RE = re.compile(r"\([^)]*\)")
+
+
+def _label_text(label: str) -> str:
+    # "Neural networks (NNs)" -> " neural networks "
+    return " " + " ".join(_WORD_RE.findall(_PAREN_RE.sub(" ", label.lower()))) + " "
+
+
+def _features(nodes: list[dict]):
+    """L2-normalized hashed TF-IDF vectors (label char n-grams + content words), one row per node."""
+    flat_index, weights = [], []
+    for row, node in enumerate(nodes):
+        data = node.get("data", {})
+        label = _label_text(data.get("label", ""))
+        for n in NGRAM_SIZES:
+            for i in range(len(label) - n + 1):
+                flat_index.append(row * DIM + zlib.crc32(label[i:i + n].encode()) % DIM)
+                weights.append(1.0)
+        for word in _WORD_RE.findall(str(data.get("content", "")).lower()):
+            flat_index.append(row * DIM + zlib.crc32(b"w:" + word.encode()) % DIM)
+            weights.append(CONTENT_WEIGHT)
+
+    matrix = np.bincount(
+        np.asarray(flat_index, dtype=np.int64),
+        weights=np.asarray(weights, dtype=np.float32),
+        minlength=len(nodes) * DIM,
+    ).astype(np.float32).reshape(len(nodes), DIM)
+
+    df = np.count_nonzero(matrix, axis=0)
+    matrix *= (np.log((1 + len(nodes)) / (1 + df)) + 1).astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def _descendants(edges: list[dict]) -> dict[str, set[str]]:
+    """Every node reachable from each node along the edges."""
+    children: dict[str, list[str]] = {}
+    for e in edges:
+        children.setdefault(e["source"], []).append(e["target"])
+
+    reach: dict[str, set[str]] = {}
+    for root in children:
+        if root in reach:
+            continue
+        # Iterative post-order DFS; a node on the current path counts as visited, so cycles terminate
+        reach[root] = set()
+        stack = [(root, iter(children[root]))]
+        while stack:
+            node, pending = stack[-1]
+            child = next(pending, None)
+            if child is None:
+                stack.pop()
+                if stack:
+                    reach[stack[-1][0]] |= reach[node] | {node}
+            elif child not in reach:
+                reach[child] = set()
+                stack.append((child, iter(children.get(child, ()))))
+            else:
+                reach[node] |= reach[child] | {child}
+    return reach
+
+
+def _candidates(nodes: list[dict]) -> list[list[int]]:
+    """
+    For each node, the later nodes worth comparing with it: those sharing one of
+    its BLOCK_SHINGLES rarest label 4-grams. Near-duplicates share most 4-grams,
+    so this keeps the comparisons near-linear instead of all n^2 pairs.
+    """
+    shingles = []
+    postings: dict[str, list[int]] = {}
+    for row, node in enumerate(nodes):
+        label = _label_text(node.get("data", {}).get("label", ""))
+        grams = {label[i:i + 4] for i in range(len(label) - 3)}
+        shingles.append(grams)
+        for gram in grams:
+            postings.setdefault(gram, []).append(row)
+
+    candidates = [set() for _ in nodes]
+    for row, grams in enumerate(shingles):
+        rarest = sorted(grams, key=lambda g: (len(postings[g]), g))[:BLOCK_SHINGLES]
+        for gram in rarest:
+            rows = postings[gram]
+            if len(rows) > MAX_POSTING:
+                continue
+            for other in rows:
+                if other != row:
+                    candidates[min(row, other)].add(max(row, other))
+    return [sorted(c) for c in candidates]
+
+
+def _cluster(nodes: list[dict], reach: dict[str, set[str]], threshold: float) -> dict[str, str]:
+    """Leader clustering in node order: {duplicate_id: leader_id}."""
+    vectors = _features(nodes)
+    candidates = _candidates(nodes)
+    ids = [n["id"] for n in nodes]
+
+    def related(a: int, b: int) -> bool:
+        return ids[b] in reach.get(ids[a], ()) or ids[a] in reach.get(ids[b], ())
+
+    leader = [-1] * len(nodes)
+    for i in range(len(nodes)):
+        if leader[i] != -1:
+            continue
+        leader[i] = i
+        members = [i]
+        later = candidates[i]
+        if not later:
+            continue
+        # Cosine similarity against this node's candidates only
+        similar = (vectors[later] @ vectors[i]) >= threshold
+        for j in np.asarray(later)[similar].tolist():
+            # Never merge a node into one of its ancestors or descendants (that would close a cycle)
+            if leader[j] == -1 and not any(related(m, j) for m in members):
+                leader[j] = i
+                members.append(j)
+
+    return {ids[j]: ids[i] for j, i in enumerate(leader) if i != j}
+
+
+def _reaches(children: dict[str, set[str]], start: str, goal: str) -> bool:
+    seen, stack = {start}, [start]
+    while stack:
+        node = stack.pop()
+        if node == goal:
+            return True
+        for child in children.get(node, ()):
+            if child not in seen:
+                seen.add(child)
+                stack.append(child)
+    return False
+
+
+def dedup_similar_nodes(graph: dict, threshold: float) -> dict:
+    """
+    Collapse near-duplicate sub/detail nodes (cosine similarity >= threshold of
+    their hashed TF-IDF vectors, same node type, neither an ancestor of the
+    other) into the earliest one, remapping edges and dropping the duplicate,
+    self-loop and cycle-closing edges that creates.
+    Only pairs sharing a rare label 4-gram are compared (see _candidates), so the
+    cost grows about linearly; node types with more than NODE_DEDUP_MAX_NODES
+    nodes are skipped. Roots are left to reconcile_roots. Returns the graph
+    unchanged without numpy.
+    """
+    if np is None:
+        logger.warning("NODE_DEDUP is enabled but numpy is not installed; skipping node dedup")
+        return graph
+
+    reach = _descendants(graph["edges"])
+    remap = {}
+    for node_type in ("sub", "detail"):
+        group = [n for n in graph["nodes"] if n["type"] == node_type]
+        if len(group) > settings.NODE_DEDUP_MAX_NODES:
+            logger.warning("Skipping node dedup of %d %s nodes (NODE_DEDUP_MAX_NODES=%d)",
+                           len(group), node_type, settings.NODE_DEDUP_MAX_NODES)
+        elif len(group) > 1:
+            remap.update(_cluster(group, reach, threshold))
+    if not remap:
+        return graph
+
+    nodes = [n for n in graph["nodes"] if n["id"] not in remap]
+    remapped = []
+    for edge in graph["edges"]:
+        source = remap.get(edge["source"], edge["source"])
+        target = remap.get(edge["target"], edge["target"])
+        remapped.append((edge, source, target, source != edge["source"] or target != edge["target"]))
+
+    # Untouched edges first, so a remapped edge that would close a cycle is the one dropped
+    children: dict[str, set[str]] = {}
+    kept = set()
+    for touched in (False, True):
+        for k, (edge, source, target, was_remapped) in enumerate(remapped):
+            if was_remapped != touched or source == target or target in children.get(source, ()):
+                continue
+            if touched and _reaches(children, target, source):
+                continue
+            children.setdefault(source, set()).add(target)
+            kept.add(k)
+    edges = [{**edge, "source": source, "target": target}
+             for k, (edge, source, target, _) in enumerate(remapped) if k in kept]
+
+    logger.info("Node dedup collapsed %d of %d nodes", len(remap), len(graph["nodes"]))
+    return {"nodes": nodes, "edges": edges}
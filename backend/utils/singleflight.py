@@ -0,0 +1,152 @@
+# backend/utils/singleflight.py
+import asyncio
+import logging
+from typing import AsyncIterator, Callable
+
+from core.config import settings
+from utils.cancellation import CancelToken
+
+logger = logging.getLogger(__name__)
+
+
+class Flight:
+    """
+    One in-flight pipeline run.
+    The pipeline runs in its own task; every subscriber replays the events
+    from the start and then follows along live, so followers see the same
+    step updates and final result as the leader.
+    When the last subscriber leaves early (or nobody subscribes after it
+    starts), the run is cancelled after a grace period unless it is nearly
+    finished (then it completes and gets cached).
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.events = []        # (event, payload) in publish order
+        self.error: BaseException | None = None
+        self.done = False
+        self.subscribers = 0
+        self.task: asyncio.Task | None = None
+        self.progress = 0.0     # fraction of chunks merged so far
+        self.cancel_token = CancelToken()
+        self._changed = asyncio.Condition()
+        self._abandon_timer: asyncio.TimerHandle | None = None
+
+    def start(self, source: AsyncIterator):
+        self.task = asyncio.create_task(self._run(source))
+        # Routes join before their response starts streaming; if the client is gone
+        # before it ever subscribes, the grace period still runs out and cancels the run
+        self._schedule_abandon()
+
+    async def _run(self, source: AsyncIterator):
+        try:
+            async for event in source:
+                if event[0] == "delta":
+                    self.progress = (event[1]["chunk"] + 1) / event[1]["total"]
+                async with self._changed:
+                    self.events.append(event)
+                    self._changed.notify_all()
+        except Exception as e:
+            # Followers get the same error as the leader
+            self.error = e
+        finally:
+            if self._abandon_timer is not None:
+                self._abandon_timer.cancel()
+            async with self._changed:
+                self.done = True
+                self._changed.notify_all()
+
+    async def subscribe(self):
+        """Yield every event of this flight (past and future); re-raise its error."""
+        self.subscribers += 1
+        if self._abandon_timer is not None:
+            # Someone came back (or joined) within the grace period
+            self._abandon_timer.cancel()
+            self._abandon_timer = None
+        index = 0
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: index < len(self.events) or self.done)
+                    new_events = self.events[index:]
+                    finished = self.done
+
+                for event in new_events:
+                    yield event
+                index += len(new_events)
+
+                if finished and index >= len(self.events):
+                    if self.error is not None:
+                        raise self.error
+                    return
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                self._schedule_abandon()
+
+    def _schedule_abandon(self):
+        if not settings.CANCEL_ON_DISCONNECT or self.cancel_token.cancelled:
+            return
+        if self.progress >= settings.CANCEL_KEEP_PROGRESS:
+            logger.info("All clients left %s at %.0f%%, finishing it for the cache", self.key, self.progress * 100)
+            return
+        loop = asyncio.get_running_loop()
+        self._abandon_timer = loop.call_later(settings.CANCEL_GRACE_SECS, self._abandon)
+
+    def _abandon(self):
+        self._abandon_timer = None
+        if self.subscribers or self.done:
+            return
+        if self.progress >= settings.CANCEL_KEEP_PROGRESS:
+            # Got far enough during the grace period
+            logger.info("All clients left %s at %.0f%%, finishing it for the cache", self.key, self.progress * 100)
+            return
+        logger.info("All clients left %s, cancelling it", self.key)
+        self.cancel_token.cancel("client disconnected")
+
+
+class SingleFlight:
+    """Coalesce identical concurrent pipelines (keyed by normalized URL or content hash)."""
+
+    def __init__(self):
+        self._flights: dict[str, Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    def join(self, key: str, factory: Callable[[CancelToken], AsyncIterator]) -> tuple[Flight, bool]:
+        """
+        Attach to the in-flight run for key, or start one with factory(cancel_token).
+        Returns (flight, is_leader).
+        """
+        flight = self._flights.get(key)
+        if flight is not None and not flight.done and not flight.cancel_token.cancelled:
+            self.coalesced += 1
+            logger.info("Coalescing request onto in-flight job %s", key)
+            return flight, False
+
+        flight = Flight(key)
+        # The factory may refuse the run (e.g. admission control); register nothing then
+        source = factory(flight.cancel_token)
+        self._flights[key] = flight
+        flight.start(source)
+        flight.task.add_done_callback(lambda _: self._forget(flight))
+        self.started += 1
+        return flight, True
+
+    def _forget(self, flight: Flight):
+        if flight.cancel_token.cancelled:
+            self.cancelled += 1
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+        }
+
+
+flights = SingleFlight()
@@ -0,0 +1,86 @@
+# backend/utils/sse.py
+"""
+Server-Sent Events protocol for the mindmap pipelines.
+
+Every event carries an increasing "id:" (its position in the run's event log).
+
+- message (unnamed)  step updates as plain text, and the final
+                     {"graph", "title"} JSON, so EventSource.onmessage clients keep working
+- event: node / edge {"chunk": i, "node" | "edge": {...}} as soon as the LLM streams it
+- event: reset       {"chunk": i, "reset": true} discard chunk i's streamed nodes/edges
+                     (its LLM attempt failed; a retry streams them again)
+- event: delta       {"chunk": i, "total": n, "nodes": [...], "edges": [...],
+                      "remap": {chunk_node_id: merged_node_id}} after chunk i is merged
+- event: queue       {"position": n} while the run waits for admission (1 = next)
+- event: result      {"graph", "title", "cached"} the reconciled final graph, plus
+                      "timings": {"total_secs", "stages", "llm"} with PIPELINE_TIMINGS_IN_RESULT
+- event: error       {"message": "..."}
+"""
+import asyncio
+import json
+from typing import AsyncIterator
+
+from core.config import settings
+
+
+def sse_message(data: str, event: str | None = None, event_id: int | None = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    for line in data.splitlines() or [""]:
+        lines.append(f"data: {line}")
+    return "\n".join(lines) + "\n\n"
+
+
+def format_pipeline_event(event: str, payload, event_id: int | None = None) -> str:
+    """Format one (event, payload) tuple from services/pipeline.py."""
+    if event == "step":
+        return sse_message(payload, event_id=event_id)
+    if event == "result":
+        # Named event with the full payload, then the legacy unnamed final message
+        return (
+            sse_message(json.dumps(payload), event="result", event_id=event_id)
+            + sse_message(json.dumps({"graph": payload["graph"], "title": payload["title"]}))
+        )
+    return sse_message(json.dumps(payload), event=event, event_id=event_id)
+
+
+def format_error(message: str, event_id: int | None = None) -> str:
+    """Named error event followed by the legacy plain-text error message."""
+    return (
+        sse_message(json.dumps({"message": message}), event="error", event_id=event_id)
+        + sse_message(message)
+    )
+
+
+async def until_disconnected(request, events: AsyncIterator) -> AsyncIterator:
+    """
+    Relay events until the client goes away. Disconnects are polled every
+    DISCONNECT_POLL_SECS even while no event is pending, and events is always
+    closed on exit so the flight it subscribes to sees the subscriber leave.
+    """
+    iterator = events.__aiter__()
+    pending: asyncio.Future | None = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=settings.DISCONNECT_POLL_SECS)
+            if not done:
+                if await request.is_disconnected():
+                    return
+                continue
+            try:
+                item = pending.result()
+            except StopAsyncIteration:
+                return
+            finally:
+                pending = None
+            yield item
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        await iterator.aclose()
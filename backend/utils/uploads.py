@@ -0,0 +1,258 @@
+# backend/utils/uploads.py
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import re
+import secrets
+import tempfile
+import time
+from dataclasses import dataclass
+
+from fastapi import UploadFile
+
+from core.config import settings
+from utils.exceptions import UploadTooLargeError
+
+logger = logging.getLogger(__name__)
+
+_HASHED_TOKEN_RE = re.compile(r"^([0-9a-f]{64})-([0-9a-f]+)(\.\w+)?$")
+_BLOB_RE = re.compile(r"^([0-9a-f]{64})(\.\w+)?$")
+
+
+@dataclass
+class SpooledUpload:
+    path: str
+    size: int
+    sha256: str
+
+    @property
+    def token(self) -> str:
+        return os.path.basename(self.path)
+
+
+async def spool_upload(file: UploadFile, suffix: str = "", directory: str | None = None) -> SpooledUpload:
+    """
+    Copy an upload to disk in UPLOAD_CHUNK_BYTES pieces, hashing as it goes.
+    Raises UploadTooLargeError (413) past UPLOAD_MAX_BYTES and leaves no file behind.
+    The file is named "<sha256>-<random><suffix>", so its token carries the content hash.
+    """
+    max_bytes = settings.UPLOAD_MAX_BYTES
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+    directory = directory or tempfile.gettempdir()
+    digest = hashlib.sha256()
+    size = 0
+    fd, partial_path = tempfile.mkstemp(suffix=".part", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(settings.UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+
+        sha256 = digest.hexdigest()
+        path = os.path.join(directory, f"{sha256}-{secrets.token_hex(4)}{suffix}")
+        os.replace(partial_path, path)
+        return SpooledUpload(path=path, size=size, sha256=sha256)
+    except BaseException:
+        try:
+            os.remove(partial_path)
+        except OSError:
+            pass
+        raise
+
+
+def token_hash(token: str) -> str | None:
+    """Content hash carried by a spool_upload token (None for other names)."""
+    match = _HASHED_TOKEN_RE.match(token)
+    return match.group(1) if match else None
+
+
+def stored_hash(file_path: str) -> str | None:
+    """Content hash of a file stored by UploadStore (None for other files)."""
+    match = _BLOB_RE.match(os.path.basename(file_path))
+    return match.group(1) if match else None
+
+
+class UploadStore:
+    """
+    Uploads kept in UPLOAD_DIR, one file per content: "<sha256><suffix>".
+    - save() spools an upload and hands out a token "<sha256>-<signature><suffix>",
+      the signature being an HMAC of the hash with UPLOAD_TOKEN_SECRET;
+      identical uploads share the stored file.
+    - path(token) checks the signature, so knowing a document's hash is not
+      enough to use (or probe for) its stored upload, and marks the file as used.
+    - A background sweeper deletes files unused for UPLOAD_TTL_SECS, then the
+      least recently used ones while the store is over UPLOAD_MAX_TOTAL_BYTES.
+    Tokens are derived from the content and the key, so they survive restarts with the files.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: int, max_total_bytes: int, sweep_interval: float,
+                 secret: str | None = None):
+        self.directory = directory
+        self._secret = secret.encode() if secret else None
+        self.ttl = ttl_seconds
+        self.max_total_bytes = max_total_bytes
+        self.sweep_interval = sweep_interval
+        self._sweeper: asyncio.Task | None = None
+
+        # Metrics
+        self.total_bytes = 0
+        self.files = 0
+        self.saved = 0
+        self.deduplicated = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.sweep()
+        self._sweeper = asyncio.create_task(self._sweep_forever(), name="upload-sweeper")
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+    async def save(self, file: UploadFile, suffix: str = "") -> str:
+        """Store an upload (size-capped, see spool_upload) and return its token."""
+        os.makedirs(self.directory, exist_ok=True)
+        upload = await spool_upload(file, suffix, directory=self.directory)
+        blob = os.path.join(self.directory, upload.sha256 + suffix)
+        try:
+            # Same content already stored: keep one copy
+            os.utime(blob)
+        except FileNotFoundError:
+            # Not stored yet (or the sweeper just deleted it)
+            pass
+        else:
+            os.remove(upload.path)
+            self.deduplicated += 1
+            return self._token(upload.sha256, suffix)
+
+        os.replace(upload.path, blob)
+        self.total_bytes += upload.size
+        self.files += 1
+        self.saved += 1
+        if self.total_bytes > self.max_total_bytes:
+            self.sweep()
+        return self._token(upload.sha256, suffix)
+
+    def path(self, token: str) -> str | None:
+        """Stored file of a token (None if the token is malformed, forged or its file was swept)."""
+        match = _HASHED_TOKEN_RE.match(token)
+        if match is None:
+            return None
+        sha256 = match.group(1)
+        if not hmac.compare_digest(match.group(2), self._signature(sha256)):
+            return None
+        blob = os.path.join(self.directory, sha256 + os.path.splitext(token)[1])
+        try:
+            os.utime(blob)
+        except OSError:
+            return None
+        return blob
+
+    def _token(self, sha256: str, suffix: str) -> str:
+        return f"{sha256}-{self._signature(sha256)}{suffix}"
+
+    def _signature(self, sha256: str) -> str:
+        return hmac.new(self._key(), sha256.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def _key(self) -> bytes:
+        """UPLOAD_TOKEN_SECRET, or a random key created once next to the uploads."""
+        if self._secret is None:
+            key_path = os.path.join(self.directory, ".token_key")
+            try:
+                with open(key_path, "rb") as f:
+                    self._secret = f.read()
+            except FileNotFoundError:
+                os.makedirs(self.directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(secrets.token_bytes(32))
+                try:
+                    # link() publishes the complete file and fails if another worker won the race
+                    os.link(tmp_path, key_path)
+                except FileExistsError:
+                    pass
+                finally:
+                    os.remove(tmp_path)
+                with open(key_path, "rb") as f:
+                    self._secret = f.read()
+        return self._secret
+
+    def sweep(self) -> int:
+        """Delete expired files, then LRU files over the size quota. Returns how many were removed."""
+        now = time.time()
+        removed = 0
+        kept = []
+        for entry in os.scandir(self.directory):
+            is_blob = _BLOB_RE.match(entry.name) is not None
+            # Partial spools (from interrupted uploads) only expire
+            if not entry.is_file() or not (is_blob or entry.name.endswith(".part")):
+                continue
+            stat = entry.stat()
+            if stat.st_mtime + self.ttl <= now and self._remove(entry.path):
+                self.expired += 1
+                removed += 1
+            elif is_blob:
+                kept.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in kept)
+        kept.sort()
+        while kept and total > self.max_total_bytes:
+            mtime, size, file_path = kept.pop(0)
+            if self._remove(file_path):
+                self.evicted += 1
+                removed += 1
+            total -= size
+
+        self.total_bytes = total
+        self.files = len(kept)
+        if removed:
+            logger.info("Upload sweep removed %d files, %d bytes left", removed, total)
+        return removed
+
+    @staticmethod
+    def _remove(file_path: str) -> bool:
+        try:
+            os.remove(file_path)
+            return True
+        except OSError as e:
+            logger.warning(f"Failed to delete upload {file_path}: {e}")
+            return False
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                logger.error(f"Upload sweep failed: {e}", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "files": self.files,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_total_bytes,
+            "saved": self.saved,
+            "deduplicated": self.deduplicated,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+upload_store = UploadStore(
+    directory=settings.UPLOAD_DIR,
+    ttl_seconds=settings.UPLOAD_TTL_SECS,
+    max_total_bytes=settings.UPLOAD_MAX_TOTAL_BYTES,
+    sweep_interval=settings.UPLOAD_SWEEP_SECS,
+    secret=settings.UPLOAD_TOKEN_SECRET,
+)